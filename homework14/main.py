@@ -1,13 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.routes.contacts import router as contacts_router
 from src.routes.auth import router as auth_router
 from src.routes.users import router as users_router
+from src.routes.audit import router as audit_router
 from src.middleware.cors import add_cors_middleware
+from src.middleware.compression import add_compression_middleware
+from src.middleware.audit import add_audit_middleware
+from src.services.audit import audit_writer
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_writer.start()
+    yield
+    audit_writer.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 add_cors_middleware(app)
+add_compression_middleware(app)
+add_audit_middleware(app)
 
 app.include_router(contacts_router, prefix="/contacts", tags=["contacts"])
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(users_router, prefix="/users", tags=["users"])
+app.include_router(audit_router, prefix="/audit", tags=["audit"])
@@ -0,0 +1,59 @@
+"""create contacts and users
+
+Revision ID: 3f1c2a9b7d10
+Revises:
+Create Date: 2026-10-19 18:40:00.000000
+
+Databases set up by the application before migrations were tracked already have these
+tables, so they are only created when missing.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b7d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if 'contacts' not in tables:
+        op.create_table(
+            'contacts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('first_name', sa.String(), nullable=True),
+            sa.Column('last_name', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('phone_number', sa.String(), nullable=True),
+            sa.Column('birthday', sa.Date(), nullable=True),
+            sa.Column('additional_info', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('phone_number'),
+        )
+        op.create_index(op.f('ix_contacts_id'), 'contacts', ['id'], unique=False)
+        op.create_index(op.f('ix_contacts_first_name'), 'contacts', ['first_name'], unique=False)
+        op.create_index(op.f('ix_contacts_last_name'), 'contacts', ['last_name'], unique=False)
+        op.create_index(op.f('ix_contacts_email'), 'contacts', ['email'], unique=True)
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('hashed_password', sa.String(), nullable=True),
+            sa.Column('is_email_verified', sa.Boolean(), nullable=True),
+            sa.Column('avatar_url', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('users')
+    op.drop_table('contacts')
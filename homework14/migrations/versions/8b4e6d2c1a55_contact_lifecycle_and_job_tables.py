@@ -0,0 +1,172 @@
+"""contact lifecycle, deduplication, audit and job tables
+
+Revision ID: 8b4e6d2c1a55
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-19 18:45:00.000000
+
+Adds the soft delete and normalization columns of ``contacts`` with their indexes, and the
+tables for the archive, change feed, audit log, idempotency keys, job checkpoints and
+failures, and contact statistics. The application creates missing tables on start, so
+tables, columns and indexes that already exist are skipped.
+
+The ``contacts`` indexes are built concurrently on PostgreSQL and ``email_normalized`` is
+filled in online batches. Phone numbers and phonetic names need the Python normalization
+rules, and the statistics need a full count; after upgrading, run::
+
+    python -m src.services.dedupe --normalize-only
+    python -m src.services.contact_stats
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.backfill import backfill, create_index_concurrently, drop_index_concurrently
+from src.database.models import birthday_key
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6d2c1a55'
+down_revision: Union[str, None] = '3f1c2a9b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text('deleted_at IS NULL')
+DELETED = sa.text('deleted_at IS NOT NULL')
+
+CONTACT_INDEXES = (
+    ('ix_contacts_email_normalized', ['email_normalized'], {}),
+    ('ix_contacts_phone_normalized', ['phone_normalized'], {}),
+    ('ix_contacts_last_name_phonetic_birthday', ['last_name_phonetic', 'birthday'], {}),
+    ('ix_contacts_live_id', ['id'], {'postgresql_where': LIVE, 'sqlite_where': LIVE}),
+    ('ix_contacts_live_birthday_key', [birthday_key(sa.column('birthday'))],
+     {'postgresql_where': LIVE, 'sqlite_where': LIVE}),
+    ('ix_contacts_deleted_at', ['deleted_at'], {'postgresql_where': DELETED, 'sqlite_where': DELETED}),
+)
+
+
+def _contact_columns():
+    return [
+        sa.Column('email_normalized', sa.String(), nullable=True),
+        sa.Column('phone_normalized', sa.String(), nullable=True),
+        sa.Column('last_name_phonetic', sa.String(), nullable=True),
+        sa.Column('normalized_version', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def _create_tables(tables: set):
+    if 'contacts_archive' not in tables:
+        op.create_table(
+            'contacts_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('first_name', sa.String(), nullable=True),
+            sa.Column('last_name', sa.String(), nullable=True),
+            sa.Column('email', sa.String(), nullable=True),
+            sa.Column('phone_number', sa.String(), nullable=True),
+            sa.Column('birthday', sa.Date(), nullable=True),
+            sa.Column('additional_info', sa.String(), nullable=True),
+            *_contact_columns(),
+            sa.Column('archived_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if 'contact_stats' not in tables:
+        op.create_table(
+            'contact_stats',
+            sa.Column('dimension', sa.String(), nullable=False),
+            sa.Column('key', sa.String(), nullable=False),
+            sa.Column('shard', sa.Integer(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('dimension', 'key', 'shard'),
+        )
+    if 'contact_changes' not in tables:
+        op.create_table(
+            'contact_changes',
+            sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('contact_id', sa.Integer(), nullable=False),
+            sa.Column('operation', sa.String(), nullable=False),
+            sa.Column('data', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('seq'),
+        )
+    if 'idempotency_keys' not in tables:
+        op.create_table(
+            'idempotency_keys',
+            sa.Column('key', sa.String(), nullable=False),
+            sa.Column('scope', sa.String(), nullable=False),
+            sa.Column('actor', sa.String(), nullable=False),
+            sa.Column('request_hash', sa.String(), nullable=False),
+            sa.Column('status_code', sa.Integer(), nullable=True),
+            sa.Column('response_body', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('key', 'scope', 'actor'),
+        )
+        op.create_index(op.f('ix_idempotency_keys_created_at'), 'idempotency_keys', ['created_at'],
+                        unique=False)
+    if 'audit_log' not in tables:
+        op.create_table(
+            'audit_log',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('actor', sa.String(), nullable=True),
+            sa.Column('action', sa.String(), nullable=False),
+            sa.Column('entity', sa.String(), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=True),
+            sa.Column('changes', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_audit_log_actor'), 'audit_log', ['actor'], unique=False)
+        op.create_index(op.f('ix_audit_log_created_at'), 'audit_log', ['created_at'], unique=False)
+        op.create_index('ix_audit_log_entity_entity_id', 'audit_log', ['entity', 'entity_id'], unique=False)
+    if 'job_checkpoints' not in tables:
+        op.create_table(
+            'job_checkpoints',
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('run_date', sa.Date(), nullable=True),
+            sa.Column('last_id', sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint('name'),
+        )
+    if 'job_failures' not in tables:
+        op.create_table(
+            'job_failures',
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('run_date', sa.Date(), nullable=False),
+            sa.Column('contact_id', sa.Integer(), nullable=False),
+            sa.Column('failed_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('name', 'run_date', 'contact_id'),
+        )
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    _create_tables(set(inspector.get_table_names()))
+
+    existing = {column['name'] for column in inspector.get_columns('contacts')}
+    for column in _contact_columns():
+        if column.name not in existing:
+            op.add_column('contacts', column)
+
+    for name, columns, kwargs in CONTACT_INDEXES:
+        create_index_concurrently(op, name, 'contacts', columns, **kwargs)
+
+    contacts = sa.table('contacts', sa.column('id', sa.Integer), sa.column('email', sa.String),
+                        sa.column('email_normalized', sa.String))
+    with op.get_context().autocommit_block():
+        backfill(op.get_bind(), contacts,
+                 {'email_normalized': sa.func.nullif(sa.func.lower(sa.func.trim(contacts.c.email)), '')},
+                 where=contacts.c.email_normalized.is_(None))
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(CONTACT_INDEXES):
+        drop_index_concurrently(op, name, 'contacts')
+    for column in reversed(_contact_columns()):
+        op.drop_column('contacts', column.name)
+    op.drop_table('job_failures')
+    op.drop_table('job_checkpoints')
+    op.drop_table('audit_log')
+    op.drop_table('idempotency_keys')
+    op.drop_table('contact_changes')
+    op.drop_table('contact_stats')
+    op.drop_table('contacts_archive')
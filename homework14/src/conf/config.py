@@ -17,6 +17,18 @@ class Settings(BaseSettings):
     MAIL_FROM: str = "reese@meta.ua",
     MAIL_PORT: int = 567234,
     MAIL_SERVER: str = "smtp.meta.ua",
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    CHANGE_FEED_POLL_SECONDS: float = 1.0
+    CHANGE_FEED_SETTLE_SECONDS: float = 5.0
+    DEFAULT_PHONE_COUNTRY_CODE: str = "380"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_PURGE_SECONDS: int = 300
+    CONTACT_STATS_SHARDS: int = 16
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_SECONDS: float = 1.0
+    CONTACT_ARCHIVE_AFTER_SECONDS: int = 86400
 
     class Config:
         env_file = ".env"
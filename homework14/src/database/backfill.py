@@ -0,0 +1,110 @@
+import time
+from sqlalchemy import Table, select, update, insert, delete, func
+from sqlalchemy.engine import Connection
+from src.database.models import JobCheckpoint
+
+_checkpoints = JobCheckpoint.__table__
+
+
+def _load_checkpoint(connection: Connection, name: str) -> int:
+    last_id = connection.execute(select(_checkpoints.c.last_id).where(_checkpoints.c.name == name)).scalar()
+    return last_id or 0
+
+
+def _save_checkpoint(connection: Connection, name: str, last_id: int):
+    result = connection.execute(update(_checkpoints).where(_checkpoints.c.name == name).values(last_id=last_id))
+    if result.rowcount == 0:
+        connection.execute(insert(_checkpoints).values(name=name, last_id=last_id))
+
+
+def _commit(connection: Connection):
+    # In autocommit mode every statement is committed on its own, and the transaction SQLAlchemy
+    # reports belongs to the caller, e.g. to an Alembic autocommit block that commits it on exit.
+    if connection.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+        connection.commit()
+
+
+def backfill(connection: Connection, table: Table, values: dict, where=None, batch_size: int = 1000,
+             pause: float = 0.1, name: str = None) -> int:
+    """
+    Update a large table in short keyset batches so that rows are never locked for long.
+
+    Each batch covers the next ``batch_size`` primary keys and commits on its own, followed by a
+    ``pause`` so that replication and other writers can keep up. The last processed key is
+    saved in ``job_checkpoints`` after every batch, so an interrupted backfill resumes where it
+    stopped; the checkpoint is removed once the backfill finishes.
+
+    In an Alembic migration, run it in an autocommit block::
+
+        with op.get_context().autocommit_block():
+            backfill(op.get_bind(), Contact.__table__,
+                     {"email_normalized": func.lower(func.trim(Contact.__table__.c.email))},
+                     where=Contact.__table__.c.email_normalized.is_(None))
+
+    :param connection: Connection, preferably in autocommit mode; otherwise every batch is committed
+    :param table: Table, the table to update; it must have an integer ``id`` primary key
+    :param values: dict, column names mapped to the new values or SQL expressions
+    :param where: optional extra condition restricting the updated rows
+    :param batch_size: int, number of primary keys covered per batch
+    :param pause: float, seconds to sleep between batches
+    :param name: str, the checkpoint name, ``backfill:<table>`` by default
+    :return: int, the number of updated rows
+    """
+    name = name or f"backfill:{table.name}"
+    last_id = _load_checkpoint(connection, name)
+    updated = 0
+    while True:
+        batch = select(table.c.id).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        upper = connection.execute(select(func.max(table.c.id)).where(table.c.id.in_(batch))).scalar()
+        if upper is None:
+            break
+        statement = update(table).where(table.c.id > last_id, table.c.id <= upper).values(values)
+        if where is not None:
+            statement = statement.where(where)
+        updated += connection.execute(statement).rowcount
+        last_id = upper
+        _save_checkpoint(connection, name, last_id)
+        _commit(connection)
+        print(f"{name}: {updated} rows updated, up to id {last_id}")
+        if pause:
+            time.sleep(pause)
+    connection.execute(delete(_checkpoints).where(_checkpoints.c.name == name))
+    _commit(connection)
+    return updated
+
+
+def create_index_concurrently(op, index_name: str, table_name: str, columns: list, **kwargs):
+    """
+    Create an index without blocking writes to the table.
+
+    On PostgreSQL the index is built with ``CREATE INDEX CONCURRENTLY IF NOT EXISTS`` outside the
+    migration transaction. Other databases get a plain ``CREATE INDEX IF NOT EXISTS``. Either way
+    a retried migration skips an index that already exists.
+
+    :param op: the Alembic ``op`` module of the running migration
+    :param index_name: str, the name of the index
+    :param table_name: str, the name of the table
+    :param columns: list, the indexed column names
+    :param kwargs: further arguments for ``op.create_index``, e.g. ``unique=True``
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(index_name, table_name, columns, if_not_exists=True, **kwargs)
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(index_name, table_name, columns, postgresql_concurrently=True, if_not_exists=True,
+                        **kwargs)
+
+
+def drop_index_concurrently(op, index_name: str, table_name: str):
+    """
+    Drop an index without blocking writes to the table.
+
+    :param op: the Alembic ``op`` module of the running migration
+    :param index_name: str, the name of the index
+    :param table_name: str, the name of the table
+    """
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
@@ -1,9 +1,23 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, JSON, Index, func, literal_column, text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 
+def birthday_key(birthday):
+    """
+    Build the ``month * 100 + day`` expression used to look up birthdays regardless of the year.
+
+    The multiplier is rendered as a literal rather than a bound parameter, so that queries
+    match the expression of ``ix_contacts_live_birthday_key`` and can use the index.
+
+    :param birthday: the birthday column
+    :return: The SQL expression
+    """
+    return func.extract('month', birthday) * literal_column('100') + func.extract('day', birthday)
+
+
 class Contact(Base):
     __tablename__ = 'contacts'
     id = Column(Integer, primary_key=True, index=True)
@@ -13,6 +27,46 @@ class Contact(Base):
     phone_number = Column(String, unique=True)
     birthday = Column(Date)
     additional_info = Column(String, nullable=True)
+    email_normalized = Column(String, nullable=True, index=True)
+    phone_normalized = Column(String, nullable=True, index=True)
+    last_name_phonetic = Column(String, nullable=True)
+    normalized_version = Column(Integer, nullable=False, default=0, server_default=text('0'))
+    deleted_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_contacts_last_name_phonetic_birthday', 'last_name_phonetic', 'birthday'),
+        Index('ix_contacts_live_id', 'id',
+              postgresql_where=text('deleted_at IS NULL'), sqlite_where=text('deleted_at IS NULL')),
+        Index('ix_contacts_live_birthday_key', birthday_key(birthday),
+              postgresql_where=text('deleted_at IS NULL'), sqlite_where=text('deleted_at IS NULL')),
+        Index('ix_contacts_deleted_at', 'deleted_at',
+              postgresql_where=text('deleted_at IS NOT NULL'), sqlite_where=text('deleted_at IS NOT NULL')),
+    )
+
+
+class ContactArchive(Base):
+    __tablename__ = 'contacts_archive'
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    first_name = Column(String)
+    last_name = Column(String)
+    email = Column(String)
+    phone_number = Column(String)
+    birthday = Column(Date)
+    additional_info = Column(String, nullable=True)
+    email_normalized = Column(String, nullable=True)
+    phone_normalized = Column(String, nullable=True)
+    last_name_phonetic = Column(String, nullable=True)
+    normalized_version = Column(Integer, nullable=False, default=0, server_default=text('0'))
+    deleted_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ContactStat(Base):
+    __tablename__ = 'contact_stats'
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
 
 
 class User(Base):
@@ -23,3 +77,53 @@ class User(Base):
     is_email_verified = Column(Boolean, default=False)
     avatar_url = Column(String)
 
+
+class ContactChange(Base):
+    __tablename__ = 'contact_changes'
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    contact_id = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    key = Column(String, primary_key=True)
+    scope = Column(String, primary_key=True)
+    actor = Column(String, primary_key=True, default="")
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class AuditLog(Base):
+    __tablename__ = 'audit_log'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    actor = Column(String, nullable=True, index=True)
+    action = Column(String, nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=True)
+    changes = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index('ix_audit_log_entity_entity_id', 'entity', 'entity_id'),
+    )
+
+
+class JobCheckpoint(Base):
+    __tablename__ = 'job_checkpoints'
+    name = Column(String, primary_key=True)
+    run_date = Column(Date)
+    last_id = Column(Integer, default=0)
+
+
+class JobFailure(Base):
+    __tablename__ = 'job_failures'
+    name = Column(String, primary_key=True)
+    run_date = Column(Date, primary_key=True)
+    contact_id = Column(Integer, primary_key=True)
+    failed_at = Column(DateTime, default=datetime.utcnow)
+
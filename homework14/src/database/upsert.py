@@ -0,0 +1,82 @@
+from typing import List, Union
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def supports_on_conflict(db: Session) -> bool:
+    """
+    Tell whether the session's database supports ``INSERT ... ON CONFLICT``.
+
+    :param db: Session, the database session
+    :return: bool, True on PostgreSQL and SQLite
+    """
+    return db.get_bind().dialect.name in _INSERTS
+
+
+def dialect_insert(db: Session, model):
+    """
+    Build an ``INSERT`` statement supporting ``ON CONFLICT`` clauses for the session's database.
+
+    :param db: Session, the database session
+    :param model: the mapped class to insert into
+    :return: The insert statement
+    :raises NotImplementedError: if the database does not support ``ON CONFLICT``; check
+        ``supports_on_conflict`` first and fall back to plain statements
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    return _INSERTS[dialect](model)
+
+
+def insert_or_ignore(db: Session, model):
+    """
+    Build an ``INSERT ... ON CONFLICT DO NOTHING`` statement for the session's database.
+
+    Combined with ``RETURNING``, the statement yields no row when a unique constraint is hit,
+    which lets callers detect conflicts without a preceding ``SELECT``. Databases without
+    ``ON CONFLICT`` get a plain ``INSERT``; run the statement with ``execute_insert_or_ignore``,
+    which handles both.
+
+    :param db: Session, the database session
+    :param model: the mapped class to insert into
+    :return: The insert statement, without values
+    """
+    if not supports_on_conflict(db):
+        return insert(model)
+    return dialect_insert(db, model).on_conflict_do_nothing()
+
+
+def execute_insert_or_ignore(db: Session, statement, values: Union[dict, List[dict]]) -> list:
+    """
+    Insert rows with a statement built by ``insert_or_ignore``, skipping rows that hit a unique constraint.
+
+    Without ``ON CONFLICT`` every row is inserted in its own savepoint, and a unique violation
+    rolls back only that savepoint, so the surrounding transaction stays usable.
+
+    :param db: Session, the database session
+    :param statement: the statement built by ``insert_or_ignore``, optionally with ``RETURNING``
+    :param values: dict or list of dicts, the rows to insert
+    :return: A list of the first ``RETURNING`` column of every inserted row; empty without ``RETURNING``
+    """
+    returning = len(statement.exported_columns) > 0
+    if supports_on_conflict(db):
+        result = db.execute(statement.values(values))
+        return result.scalars().all() if returning else []
+    inserted = []
+    for row in values if isinstance(values, list) else [values]:
+        try:
+            with db.begin_nested():
+                result = db.execute(statement.values(row))
+                if returning:
+                    inserted.extend(result.scalars().all())
+        except IntegrityError:
+            continue
+    return inserted
@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from jose import jwt, JWTError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.services.audit_context import current_actor
+from src.services.auth import SECRET_KEY, ALGORITHM
+
+
+def _actor(scope: Scope):
+    authorization = Headers(scope=scope).get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            return jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            pass
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+class AuditActorMiddleware:
+    """
+    Record who made the request, for the audit log: the subject of a valid bearer token,
+    otherwise the client address.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_actor.set(_actor(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_actor.reset(token)
+
+
+def add_audit_middleware(app: FastAPI):
+    app.add_middleware(AuditActorMiddleware)
@@ -0,0 +1,23 @@
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from src.conf.config import settings
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+def add_compression_middleware(app: FastAPI):
+    """
+    Compress responses larger than the configured minimum size.
+
+    Brotli is used when the optional ``brotli-asgi`` package is installed, falling back
+    to gzip for clients that do not accept it; otherwise responses are gzip-compressed.
+
+    :param app: FastAPI, the application to add the middleware to
+    """
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
@@ -0,0 +1,28 @@
+from sqlalchemy.orm import Session
+from src.database.models import AuditLog
+
+
+def get_audit_log(db: Session, entity: str = None, entity_id: int = None, action: str = None, actor: str = None,
+                  since: int = 0, limit: int = 100):
+    """
+    Retrieve audit entries, optionally filtered, in the order they were written.
+
+    :param db: Session, the database session
+    :param entity: str, only entries for this entity type, e.g. ``contact``
+    :param entity_id: int, only entries for this entity ID
+    :param action: str, only entries for this action: ``create``, ``update``, ``delete`` or ``restore``
+    :param actor: str, only entries made by this actor
+    :param since: int, only entries with a greater ID are returned
+    :param limit: int, maximum number of entries to return
+    :return: A list of audit entries ordered by ID
+    """
+    query = db.query(AuditLog).filter(AuditLog.id > since)
+    if entity is not None:
+        query = query.filter(AuditLog.entity == entity)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if action is not None:
+        query = query.filter(AuditLog.action == action)
+    if actor is not None:
+        query = query.filter(AuditLog.actor == actor)
+    return query.order_by(AuditLog.id).limit(limit).all()
@@ -0,0 +1,93 @@
+from datetime import date
+from typing import List
+from sqlalchemy.orm import Session
+from src.database.models import JobCheckpoint, JobFailure
+from src.database.upsert import insert_or_ignore, execute_insert_or_ignore
+
+
+def get_checkpoint(db: Session, name: str, run_date: date) -> int:
+    """
+    Retrieve the last processed ID of a job run.
+
+    :param db: Session, the database session
+    :param name: str, the name of the job
+    :param run_date: date, the date identifying the run
+    :return: The last processed ID, or 0 if the run has not started yet
+    """
+    checkpoint = db.query(JobCheckpoint).filter(JobCheckpoint.name == name).first()
+    if checkpoint is None or checkpoint.run_date != run_date:
+        return 0
+    return checkpoint.last_id
+
+
+def save_checkpoint(db: Session, name: str, run_date: date, last_id: int):
+    """
+    Record the progress of a job run so that a restart resumes after ``last_id``.
+
+    :param db: Session, the database session
+    :param name: str, the name of the job
+    :param run_date: date, the date identifying the run
+    :param last_id: int, the last processed ID
+    :return: The saved checkpoint instance
+    """
+    checkpoint = db.query(JobCheckpoint).filter(JobCheckpoint.name == name).first()
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=name)
+        db.add(checkpoint)
+    checkpoint.run_date = run_date
+    checkpoint.last_id = last_id
+    db.commit()
+    return checkpoint
+
+
+def get_failures(db: Session, name: str, run_date: date) -> List[int]:
+    """
+    Retrieve the contacts a job run failed to process.
+
+    :param db: Session, the database session
+    :param name: str, the name of the job
+    :param run_date: date, the date identifying the run
+    :return: The IDs of the failed contacts in ascending order
+    """
+    rows = (
+        db.query(JobFailure.contact_id)
+        .filter(JobFailure.name == name, JobFailure.run_date == run_date)
+        .order_by(JobFailure.contact_id)
+        .all()
+    )
+    return [row.contact_id for row in rows]
+
+
+def record_failures(db: Session, name: str, run_date: date, contact_ids: List[int]):
+    """
+    Remember contacts a job run failed to process, in the current transaction.
+
+    The rows are committed together with the next ``save_checkpoint``, so the checkpoint never
+    moves past a failure that has not been recorded.
+
+    :param db: Session, the database session
+    :param name: str, the name of the job
+    :param run_date: date, the date identifying the run
+    :param contact_ids: list, the IDs of the failed contacts
+    """
+    if not contact_ids:
+        return
+    execute_insert_or_ignore(db, insert_or_ignore(db, JobFailure),
+                             [{"name": name, "run_date": run_date, "contact_id": contact_id}
+                              for contact_id in contact_ids])
+
+
+def clear_failures(db: Session, name: str, run_date: date, contact_ids: List[int]):
+    """
+    Forget failures that have been retried successfully.
+
+    :param db: Session, the database session
+    :param name: str, the name of the job
+    :param run_date: date, the date identifying the run
+    :param contact_ids: list, the IDs of the contacts to forget
+    """
+    if contact_ids:
+        db.query(JobFailure).filter(
+            JobFailure.name == name, JobFailure.run_date == run_date, JobFailure.contact_id.in_(contact_ids)
+        ).delete(synchronize_session=False)
+    db.commit()
@@ -1,8 +1,91 @@
 from sqlalchemy.orm import Session
-from src.database.models import Contact
+from src.database.models import Contact, ContactChange, ContactArchive, birthday_key
+from src.database.upsert import insert_or_ignore, execute_insert_or_ignore
+from src.repository.stats import contact_buckets, update_stats
 from src.schemas import ContactCreate, ContactUpdate
-from sqlalchemy import or_, func, tuple_
-from datetime import date, timedelta
+from src.conf.config import settings
+from src.services.audit_context import AUDIT_ACTION
+from src.services.normalization import normalize_email, normalize_phone, soundex, NORMALIZATION_VERSION
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select, insert, delete
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+CONTACT_FIELDS = ("id", "first_name", "last_name", "email", "phone_number", "birthday", "additional_info")
+_INSERT_FIELDS = CONTACT_FIELDS[1:] + ("email_normalized", "phone_normalized", "last_name_phonetic",
+                                       "normalized_version")
+_ARCHIVE_FIELDS = ("id",) + _INSERT_FIELDS + ("deleted_at",)
+_LIVE = Contact.deleted_at.is_(None)
+_BIRTHDAY_KEY = birthday_key(Contact.birthday)
+BATCH_CHUNK_SIZE = 500
+CONTACT_CONFLICT = "Contact with this email or phone number already exists"
+
+
+def _contacts_query(db: Session, fields: Optional[List[str]] = None):
+    """
+    Build a query over contacts, projecting only the requested columns.
+
+    :param db: Session, the database session
+    :param fields: list, names of the columns to select, or None for full Contact instances
+    :return: A query yielding Contact instances or rows with the selected columns
+    """
+    if fields is None:
+        return db.query(Contact)
+    return db.query(*[getattr(Contact, field) for field in fields])
+
+
+def _contact_data(contact: Contact) -> dict:
+    """
+    Serialize a contact into a JSON-compatible dictionary for the change log.
+
+    :param contact: Contact, the contact to serialize
+    :return: A dictionary of the contact's columns
+    """
+    data = {field: getattr(contact, field) for field in CONTACT_FIELDS}
+    if data["birthday"] is not None:
+        data["birthday"] = data["birthday"].isoformat()
+    return data
+
+
+def normalize_contact(contact: Contact):
+    """
+    Fill in the normalized email, E.164 phone and phonetic last name used for duplicate detection.
+
+    :param contact: Contact, the contact to update in place
+    """
+    contact.email_normalized = normalize_email(contact.email)
+    contact.phone_normalized = normalize_phone(contact.phone_number)
+    contact.last_name_phonetic = soundex(contact.last_name)
+    contact.normalized_version = NORMALIZATION_VERSION
+
+
+def _record_change(db: Session, operation: str, contact: Contact):
+    """
+    Append a contact mutation to the change log in the current transaction.
+
+    The operation is also the event type of the change feed, so SSE clients receive
+    ``create``, ``update``, ``delete`` and ``restore`` events.
+
+    :param db: Session, the database session
+    :param operation: str, one of ``create``, ``update``, ``delete`` or ``restore``
+    :param contact: Contact, the mutated contact
+    """
+    data = None if operation == "delete" else _contact_data(contact)
+    db.add(ContactChange(contact_id=contact.id, operation=operation, data=data))
+
+
+def _contacts_result(rows, fields: Optional[List[str]] = None):
+    """
+    Convert query results to the shape returned by the repository.
+
+    :param rows: list, Contact instances or projected rows
+    :param fields: list, names of the projected columns, or None
+    :return: Contact instances unchanged, or dictionaries of the projected columns
+    """
+    if fields is None:
+        return rows
+    return [row._asdict() for row in rows]
 
 
 def get_contact(db: Session, contact_id: int):
@@ -11,30 +94,58 @@ def get_contact(db: Session, contact_id: int):
 
     :param db: Session, the database session
     :param contact_id: int, the unique identifier of the contact
-    :return: Returns the contact instance or None if not found
+    :return: Returns the contact instance or None if not found or deleted
     """
-    return db.query(Contact).filter(Contact.id == contact_id).first()
+    return db.query(Contact).filter(Contact.id == contact_id, _LIVE).first()
+
 
+def get_contacts_by_ids(db: Session, contact_ids: List[int],
+                        chunk_size: int = BATCH_CHUNK_SIZE) -> Tuple[List[Contact], List[int]]:
+    """
+    Retrieve several contacts by their IDs using ``WHERE id IN (...)`` queries.
 
-def get_contacts(db: Session, skip: int = 0, limit: int = 100):
+    Large ID lists are split into chunks of ``chunk_size`` so a single statement never
+    carries an unbounded number of parameters.
+
+    :param db: Session, the database session
+    :param contact_ids: list, the IDs of the contacts to retrieve; duplicates are ignored
+    :param chunk_size: int, maximum number of IDs per query
+    :return: A tuple of the found contacts in request order and the IDs that were not found
+    """
+    unique_ids = list(dict.fromkeys(contact_ids))
+    found = {}
+    for start in range(0, len(unique_ids), chunk_size):
+        chunk = unique_ids[start:start + chunk_size]
+        for contact in db.query(Contact).filter(Contact.id.in_(chunk), _LIVE).all():
+            found[contact.id] = contact
+    contacts = [found[contact_id] for contact_id in unique_ids if contact_id in found]
+    missing = [contact_id for contact_id in unique_ids if contact_id not in found]
+    return contacts, missing
+
+
+def get_contacts(db: Session, skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None):
     """
     Retrieve a list of contacts, with pagination.
 
     :param db: Session, the database session
     :param skip: int, number of items to skip (for pagination)
     :param limit: int, maximum number of items to return (for pagination)
+    :param fields: list, optional names of the columns to return
     :return: A list of contacts
     """
-    return db.query(Contact).offset(skip).limit(limit).all()
+    return _contacts_result(_contacts_query(db, fields).filter(_LIVE).offset(skip).limit(limit).all(), fields)
 
 
 def create_contact(db: Session, contact_data: ContactCreate):
     """
     Create a new contact in the database.
 
+    The row is written with ``INSERT ... ON CONFLICT DO NOTHING RETURNING``, so a duplicate
+    email or phone number is reported without a failed transaction or an extra ``SELECT``.
+
     :param db: Session, the database session
     :param contact_data: ContactCreate, the schema instance containing the contact data
-    :return: The newly created contact instance
+    :return: The newly created contact instance, or None if the email or phone number is taken
     """
     contact = Contact(
         first_name=contact_data.first_name,
@@ -44,7 +155,15 @@ def create_contact(db: Session, contact_data: ContactCreate):
         birthday=contact_data.birthday,
         additional_info=contact_data.additional_info
     )
-    db.add(contact)
+    normalize_contact(contact)
+    values = {field: getattr(contact, field) for field in _INSERT_FIELDS}
+    inserted = execute_insert_or_ignore(db, insert_or_ignore(db, Contact).returning(Contact), values)
+    if not inserted:
+        db.rollback()
+        return None
+    contact = inserted[0]
+    update_stats(db, contact.id, added=contact_buckets(contact))
+    _record_change(db, "create", contact)
     db.commit()
     db.refresh(contact)
     return contact
@@ -58,63 +177,206 @@ def update_contact(db: Session, contact_id: int, contact_data: ContactUpdate):
     :param contact_id: int, the ID of the contact to update
     :param contact_data: ContactUpdate, the schema instance containing the updated data
     :return: The updated contact instance or None if not found
+    :raises HTTPException: 409 if the new email or phone number is already used by another contact
     """
-    contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    contact = db.query(Contact).filter(Contact.id == contact_id, _LIVE).first()
     if contact:
+        buckets = contact_buckets(contact)
         contact_data_dict = contact_data.dict(exclude_unset=True)
         for key, value in contact_data_dict.items():
             setattr(contact, key, value)
-        db.commit()
+        normalize_contact(contact)
+        try:
+            update_stats(db, contact.id, removed=buckets, added=contact_buckets(contact))
+            _record_change(db, "update", contact)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=CONTACT_CONFLICT)
         db.refresh(contact)
     return contact
 
 
 def delete_contact(db: Session, contact_id: int):
     """
-    Delete a contact from the database by ID.
+    Delete a contact by ID.
+
+    The contact is only marked as deleted, so it can be restored; ``archive_deleted_contacts``
+    later moves it to the archive table.
 
     :param db: Session, the database session
     :param contact_id: int, the ID of the contact to delete
     :return: True if the contact was deleted, False otherwise
     """
-    contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    contact = db.query(Contact).filter(Contact.id == contact_id, _LIVE).first()
     if contact:
-        db.delete(contact)
+        contact.deleted_at = datetime.utcnow()
+        update_stats(db, contact.id, removed=contact_buckets(contact))
+        _record_change(db, "delete", contact)
         db.commit()
         return True
     return False
 
 
-def get_contacts_by_search(db: Session, query: str):
+def restore_contact(db: Session, contact_id: int):
+    """
+    Restore a deleted contact, whether it is still marked as deleted or already archived.
+
+    :param db: Session, the database session
+    :param contact_id: int, the ID of the contact to restore
+    :return: The restored contact instance or None if there is no deleted contact with this ID
+    :raises HTTPException: 409 if its email or phone number has been taken by another contact since
+    """
+    contact = db.query(Contact).filter(Contact.id == contact_id, Contact.deleted_at.isnot(None)).first()
+    if contact is None:
+        archived = db.query(ContactArchive).filter(ContactArchive.id == contact_id).first()
+        if archived is None:
+            return None
+        values = {field: getattr(archived, field) for field in _ARCHIVE_FIELDS if field != "deleted_at"}
+        statement = insert_or_ignore(db, Contact).returning(Contact).execution_options(
+            **{AUDIT_ACTION: "restore"})
+        inserted = execute_insert_or_ignore(db, statement, values)
+        if not inserted:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=CONTACT_CONFLICT)
+        contact = inserted[0]
+        db.delete(archived)
+    contact.deleted_at = None
+    update_stats(db, contact.id, added=contact_buckets(contact))
+    _record_change(db, "restore", contact)
+    db.commit()
+    db.refresh(contact)
+    return contact
+
+
+def archive_deleted_contacts(db: Session, older_than: timedelta, batch_size: int = BATCH_CHUNK_SIZE) -> int:
+    """
+    Move contacts deleted more than ``older_than`` ago to the archive table, in batches.
+
+    Each batch is copied with ``INSERT ... SELECT``, removed from ``contacts`` and committed,
+    which keeps the live table and its indexes small without long-running transactions.
+    Both statements re-check that the contacts are still deleted, so a contact restored after
+    the batch was selected stays in place. On PostgreSQL the batch is moved by a single
+    ``DELETE ... RETURNING`` feeding the insert, so exactly the deleted rows are archived.
+
+    :param db: Session, the database session
+    :param older_than: timedelta, how long a deleted contact stays restorable in place
+    :param batch_size: int, number of contacts moved per transaction
+    :return: int, the number of archived contacts
+    """
+    cutoff = datetime.utcnow() - older_than
+    contacts = Contact.__table__
+    columns = [contacts.c[field] for field in _ARCHIVE_FIELDS]
+    returning = db.get_bind().dialect.name == "postgresql"
+    archived = 0
+    while True:
+        ids = db.scalars(
+            select(Contact.id).where(Contact.deleted_at.isnot(None), Contact.deleted_at < cutoff)
+            .order_by(Contact.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return archived
+        expired = and_(contacts.c.id.in_(ids), contacts.c.deleted_at.isnot(None),
+                       contacts.c.deleted_at < cutoff)
+        if returning:
+            moved = delete(contacts).where(expired).returning(*columns).cte("moved")
+            rows = select(*[moved.c[field] for field in _ARCHIVE_FIELDS])
+        else:
+            rows = select(*columns).where(expired)
+        result = db.execute(insert(ContactArchive.__table__).from_select(list(_ARCHIVE_FIELDS), rows))
+        if not returning:
+            db.execute(delete(contacts).where(expired))
+        db.commit()
+        archived += result.rowcount
+
+
+def get_changes(db: Session, since: int = 0, limit: int = 100, settle_seconds: float = None):
+    """
+    Retrieve contact mutations recorded after the given sequence number.
+
+    Sequence numbers are assigned when a change is written, not when its transaction commits,
+    so a missing number may belong to a transaction that is still open. Changes are therefore
+    only returned up to the first gap in the sequence, until the change after the gap is older
+    than ``settle_seconds``; by then the gap is assumed to come from a rolled back transaction.
+    A client resuming from the last returned sequence number misses no change whose transaction
+    commits within ``settle_seconds`` of writing it.
+
+    :param db: Session, the database session
+    :param since: int, only changes with a greater sequence number are returned
+    :param limit: int, maximum number of changes to return
+    :param settle_seconds: float, how long a gap holds back later changes,
+        ``CHANGE_FEED_SETTLE_SECONDS`` by default
+    :return: A list of changes ordered by sequence number
+    """
+    if settle_seconds is None:
+        settle_seconds = settings.CHANGE_FEED_SETTLE_SECONDS
+    changes = (db.query(ContactChange).filter(ContactChange.seq > since)
+               .order_by(ContactChange.seq).limit(limit).all())
+    settled = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    expected = since + 1
+    for index, change in enumerate(changes):
+        if change.seq != expected and change.created_at > settled:
+            return changes[:index]
+        expected = change.seq + 1
+    return changes
+
+
+def get_contacts_by_search(db: Session, query: str, fields: Optional[List[str]] = None):
     """
     Search for contacts matching the given query string.
 
     :param db: Session, the database session
     :param query: str, the query string to match against contacts' attributes
+    :param fields: list, optional names of the columns to return
     :return: A list of contacts matching the query
     """
-    return db.query(Contact).filter(
+    return _contacts_result(_contacts_query(db, fields).filter(
+        _LIVE,
         or_(
             Contact.first_name.ilike(f'%{query}%'),
             Contact.last_name.ilike(f'%{query}%'),
             Contact.email.ilike(f'%{query}%')
         )
-    ).all()
+    ).all(), fields)
 
 
-def get_birthdays(db: Session):
+def get_birthdays_page(db: Session, target: date, after_id: int = 0, limit: int = BATCH_CHUNK_SIZE):
+    """
+    Retrieve one page of contacts whose birthday falls on the given date.
+
+    Pages are keyed on the contact ID rather than an offset, so each page costs the same
+    however far into the table the walk has progressed. Contacts born on February 29
+    are included on February 28 in non-leap years.
+
+    :param db: Session, the database session
+    :param target: date, the day whose birthdays are requested
+    :param after_id: int, only contacts with an ID greater than this are returned
+    :param limit: int, maximum number of contacts in the page
+    :return: A list of contacts ordered by ID
+    """
+    keys = [target.month * 100 + target.day]
+    if (target.month, target.day) == (2, 28) and (target + timedelta(days=1)).month == 3:
+        keys.append(229)
+    return db.query(Contact).filter(
+        Contact.id > after_id,
+        _LIVE,
+        _BIRTHDAY_KEY.in_(keys)
+    ).order_by(Contact.id).limit(limit).all()
+
+
+def get_birthdays(db: Session, fields: Optional[List[str]] = None):
     """
     Retrieve contacts whose birthdays occur within the next week.
 
     :param db: Session, the database session
+    :param fields: list, optional names of the columns to return
     :return: A list of contacts having birthdays within the next week
     """
     today = date.today()
     seven_days = [today + timedelta(days=i) for i in range(8)]
-    birthdays = db.query(Contact).filter(
-        tuple_(func.extract('month', Contact.birthday), func.extract('day', Contact.birthday)).in_(
-            [(d.month, d.day) for d in seven_days]
-        )
+    birthdays = _contacts_query(db, fields).filter(
+        _LIVE,
+        _BIRTHDAY_KEY.in_([d.month * 100 + d.day for d in seven_days])
     ).all()
-    return birthdays
+    return _contacts_result(birthdays, fields)
 
@@ -0,0 +1,78 @@
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
+from src.database.models import Contact
+from src.services.normalization import NORMALIZATION_VERSION
+
+BLOCKING_KEYS = (
+    (Contact.email_normalized,),
+    (Contact.phone_normalized,),
+    (Contact.last_name_phonetic, Contact.birthday),
+)
+
+
+def get_duplicate_candidates(db: Session, contact: Contact, limit: int = 100):
+    """
+    Retrieve contacts sharing at least one blocking key with the given contact.
+
+    Every blocking key is backed by an index, so the lookup does not scan the table.
+
+    :param db: Session, the database session
+    :param contact: Contact, the contact to find candidates for
+    :param limit: int, maximum number of candidates to return
+    :return: A list of candidate contacts, excluding the contact itself
+    """
+    conditions = []
+    for columns in BLOCKING_KEYS:
+        values = [getattr(contact, column.key) for column in columns]
+        if all(value is not None for value in values):
+            conditions.append(and_(*[column == value for column, value in zip(columns, values)]))
+    if not conditions:
+        return []
+    return db.query(Contact).filter(
+        Contact.id != contact.id, Contact.deleted_at.is_(None), or_(*conditions)
+    ).order_by(Contact.id).limit(limit).all()
+
+
+def get_blocks(db: Session, columns: tuple):
+    """
+    Retrieve the values of a blocking key shared by more than one contact.
+
+    :param db: Session, the database session
+    :param columns: tuple, the columns forming the blocking key
+    :return: A list of key value tuples
+    """
+    return db.query(*columns).filter(
+        Contact.deleted_at.is_(None), *[column.isnot(None) for column in columns]
+    ).group_by(*columns).having(func.count(Contact.id) > 1).all()
+
+
+def get_block_contacts(db: Session, columns: tuple, key: tuple, limit: int = 100):
+    """
+    Retrieve the contacts of one block.
+
+    :param db: Session, the database session
+    :param columns: tuple, the columns forming the blocking key
+    :param key: tuple, the values of the blocking key
+    :param limit: int, maximum number of contacts to return
+    :return: A list of contacts ordered by ID
+    """
+    return db.query(Contact).filter(
+        Contact.deleted_at.is_(None), *[column == value for column, value in zip(columns, key)]
+    ).order_by(Contact.id).limit(limit).all()
+
+
+def get_unnormalized_contacts(db: Session, after_id: int = 0, limit: int = 500):
+    """
+    Retrieve one page of contacts not yet normalized with the current rules.
+
+    Progress is tracked by ``normalized_version`` rather than by NULL columns, since a contact
+    without e.g. letters in its last name keeps a NULL phonetic code after normalization.
+
+    :param db: Session, the database session
+    :param after_id: int, only contacts with an ID greater than this are returned
+    :param limit: int, maximum number of contacts in the page
+    :return: A list of contacts ordered by ID
+    """
+    return db.query(Contact).filter(
+        Contact.id > after_id, Contact.normalized_version < NORMALIZATION_VERSION
+    ).order_by(Contact.id).limit(limit).all()
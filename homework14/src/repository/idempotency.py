@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.database.models import IdempotencyKey
+
+
+def _matches(key: str, scope: str, actor: str):
+    return and_(IdempotencyKey.key == key, IdempotencyKey.scope == scope, IdempotencyKey.actor == actor)
+
+
+def get_idempotency_key(db: Session, key: str, scope: str, actor: str):
+    """
+    Retrieve a stored idempotency key, reading its latest committed state.
+
+    :param db: Session, the database session
+    :param key: str, the client-supplied idempotency key
+    :param scope: str, the operation the key belongs to
+    :param actor: str, the user or client that sent the key
+    :return: The idempotency key instance or None if not found
+    """
+    db.expire_all()
+    return db.query(IdempotencyKey).filter(_matches(key, scope, actor)).first()
+
+
+def create_idempotency_key(db: Session, key: str, scope: str, actor: str, request_hash: str) -> bool:
+    """
+    Claim an idempotency key for a request that is about to run.
+
+    The key is committed straight away so that concurrent requests with the same key see it.
+
+    :param db: Session, the database session
+    :param key: str, the client-supplied idempotency key
+    :param scope: str, the operation the key belongs to
+    :param actor: str, the user or client that sent the key
+    :param request_hash: str, a hash of the request body
+    :return: bool, True if the key was claimed, False if it already exists
+    """
+    db.add(IdempotencyKey(key=key, scope=scope, actor=actor, request_hash=request_hash))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def complete_idempotency_key(db: Session, key: str, scope: str, actor: str, status_code: int, response_body):
+    """
+    Store the response of a request so that retries can replay it.
+
+    :param db: Session, the database session
+    :param key: str, the client-supplied idempotency key
+    :param scope: str, the operation the key belongs to
+    :param actor: str, the user or client that sent the key
+    :param status_code: int, the HTTP status code of the response
+    :param response_body: the JSON-compatible response body
+    """
+    db.query(IdempotencyKey).filter(_matches(key, scope, actor)).update(
+        {IdempotencyKey.status_code: status_code, IdempotencyKey.response_body: response_body}
+    )
+    db.commit()
+
+
+def delete_idempotency_key(db: Session, key: str, scope: str, actor: str):
+    """
+    Release an idempotency key, e.g. after the request failed unexpectedly.
+
+    :param db: Session, the database session
+    :param key: str, the client-supplied idempotency key
+    :param scope: str, the operation the key belongs to
+    :param actor: str, the user or client that sent the key
+    """
+    db.query(IdempotencyKey).filter(_matches(key, scope, actor)).delete()
+    db.commit()
+
+
+def purge_expired_idempotency_keys(db: Session, ttl_seconds: int) -> int:
+    """
+    Delete idempotency keys older than the time-to-live.
+
+    :param db: Session, the database session
+    :param ttl_seconds: int, how long keys are kept
+    :return: int, the number of deleted keys
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    deleted = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete()
+    db.commit()
+    return deleted
@@ -0,0 +1,210 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from src.conf.config import settings
+from src.database.models import Contact, ContactStat
+from src.database.upsert import dialect_insert, insert_or_ignore, execute_insert_or_ignore, supports_on_conflict
+
+TOTAL = "total"
+BIRTH_MONTH = "birth_month"
+EMAIL_DOMAIN = "email_domain"
+REBUILD_CHUNK_SIZE = 1000
+
+Bucket = Tuple[str, str]
+
+
+def contact_buckets(contact: Contact) -> List[Bucket]:
+    """
+    List the summary buckets a contact is counted in.
+
+    :param contact: Contact, the contact to classify
+    :return: A list of ``(dimension, key)`` pairs
+    """
+    buckets = [(TOTAL, "")]
+    if contact.birthday is not None:
+        buckets.append((BIRTH_MONTH, str(contact.birthday.month)))
+    if contact.email:
+        buckets.append((EMAIL_DOMAIN, contact.email.rsplit("@", 1)[-1].lower()))
+    return buckets
+
+
+def _increment(db: Session, value: dict):
+    # Fallback for databases without ON CONFLICT: update the counter row, or create it if it does not exist yet.
+    row = db.query(ContactStat).filter(ContactStat.dimension == value["dimension"],
+                                       ContactStat.key == value["key"], ContactStat.shard == value["shard"])
+    increment = {ContactStat.count: ContactStat.count + value["count"]}
+    if row.update(increment, synchronize_session=False):
+        return
+    if not execute_insert_or_ignore(db, insert_or_ignore(db, ContactStat).returning(ContactStat.shard), value):
+        # Another transaction created the row in the meantime.
+        row.update(increment, synchronize_session=False)
+
+
+def _add_counts(db: Session, deltas: Dict[Bucket, int], shard: int):
+    """
+    Add deltas to the counters of one shard with a single ``INSERT ... ON CONFLICT DO UPDATE``.
+
+    :param db: Session, the database session
+    :param deltas: dict, the amount to add to each ``(dimension, key)``
+    :param shard: int, the shard whose counter rows are updated
+    """
+    # Sorted so that concurrent transactions lock the counter rows in the same order and cannot deadlock.
+    values = [{"dimension": dimension, "key": key, "shard": shard, "count": delta}
+              for (dimension, key), delta in sorted(deltas.items()) if delta]
+    if not values:
+        return
+    if not supports_on_conflict(db):
+        for value in values:
+            _increment(db, value)
+        return
+    statement = dialect_insert(db, ContactStat).values(values)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[ContactStat.dimension, ContactStat.key, ContactStat.shard],
+        set_={"count": ContactStat.count + statement.excluded.count},
+    ))
+
+
+def update_stats(db: Session, contact_id: int, removed: Optional[List[Bucket]] = None,
+                 added: Optional[List[Bucket]] = None):
+    """
+    Adjust the summary counters in the current transaction, so they commit together with the contact change.
+
+    Every counter is split over ``CONTACT_STATS_SHARDS`` rows and a contact always updates the
+    shard picked by its ID, so concurrent writes to different contacts rarely wait on the same
+    row lock, including the one of the overall total.
+
+    :param db: Session, the database session
+    :param contact_id: int, the ID of the changed contact
+    :param removed: list, buckets the contact is no longer counted in
+    :param added: list, buckets the contact is now counted in
+    """
+    deltas = Counter(added or [])
+    deltas.subtract(removed or [])
+    _add_counts(db, deltas, contact_id % settings.CONTACT_STATS_SHARDS)
+
+
+def _stored_counts(db: Session, *dimensions: str):
+    """
+    Build a query summing the counter shards per ``(dimension, key)``.
+
+    :param db: Session, the database session
+    :param dimensions: str, only these dimensions, or all of them if none is given
+    :return: The query and its summed count column
+    """
+    total = func.sum(ContactStat.count).label("count")
+    query = (db.query(ContactStat.dimension, ContactStat.key, total)
+             .group_by(ContactStat.dimension, ContactStat.key))
+    if dimensions:
+        query = query.filter(ContactStat.dimension.in_(dimensions))
+    return query, total
+
+
+def get_stats(db: Session, domains: int = 10) -> dict:
+    """
+    Read contact statistics from the summary table, independently of the number of contacts.
+
+    :param db: Session, the database session
+    :param domains: int, number of most common email domains to return
+    :return: A dictionary with the ``total``, ``birthdays_per_month`` and ``email_domains`` counts
+    """
+    query, _ = _stored_counts(db, TOTAL, BIRTH_MONTH)
+    months = {month: 0 for month in range(1, 13)}
+    total = 0
+    for row in query.all():
+        if row.dimension == TOTAL:
+            total = row.count
+        else:
+            months[int(row.key)] = row.count
+    query, count = _stored_counts(db, EMAIL_DOMAIN)
+    top_domains = query.having(count > 0).order_by(count.desc(), ContactStat.key).limit(domains).all()
+    return {
+        "total": total,
+        "birthdays_per_month": months,
+        "email_domains": {row.key: row.count for row in top_domains},
+    }
+
+
+def compute_stats(db: Session, chunk_size: int = REBUILD_CHUNK_SIZE) -> Dict[Bucket, int]:
+    """
+    Count the buckets of every live contact from scratch.
+
+    :param db: Session, the database session
+    :param chunk_size: int, number of contacts fetched per round trip
+    :return: A dictionary mapping ``(dimension, key)`` to its count
+    """
+    counts = Counter()
+    rows = db.execute(
+        select(Contact.birthday, Contact.email).where(Contact.deleted_at.is_(None))
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in rows:
+        counts.update(contact_buckets(row))
+    return dict(counts)
+
+
+def check_stats(db: Session) -> Dict[Bucket, Tuple[int, int]]:
+    """
+    Compare the summary counters with a fresh count of the contacts, without locking or writing anything.
+
+    Both are read in one transaction (``REPEATABLE READ`` on PostgreSQL), so they describe the
+    same snapshot: counter updates commit together with their contact changes, and writes made
+    during the scan are in neither. The session's current transaction is ended first.
+
+    :param db: Session, the database session
+    :return: A dictionary mapping every drifted ``(dimension, key)`` to its ``(stored, actual)`` counts
+    """
+    db.rollback()
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    try:
+        query, _ = _stored_counts(db)
+        stored = {(row.dimension, row.key): row.count for row in query.all()}
+        actual = compute_stats(db)
+    finally:
+        db.rollback()
+    return {
+        bucket: (stored.get(bucket, 0), actual.get(bucket, 0))
+        for bucket in stored.keys() | actual.keys()
+        if stored.get(bucket, 0) != actual.get(bucket, 0)
+    }
+
+
+def _spread(deltas: Dict[Bucket, int]) -> Dict[int, Dict[Bucket, int]]:
+    """
+    Split every delta as evenly as possible over the counter shards.
+
+    :param deltas: dict, the amount to add to each ``(dimension, key)``
+    :return: A dictionary mapping each shard to the deltas it receives
+    """
+    shards = {}
+    for bucket, delta in deltas.items():
+        share, remainder = divmod(delta, settings.CONTACT_STATS_SHARDS)
+        for shard in range(settings.CONTACT_STATS_SHARDS):
+            shards.setdefault(shard, {})[bucket] = share + (1 if shard < remainder else 0)
+    return shards
+
+
+def rebuild_stats(db: Session, dry_run: bool = False) -> Dict[Bucket, Tuple[int, int]]:
+    """
+    Correct drifted summary counters from a fresh count of the contacts.
+
+    The contacts are counted by ``check_stats`` without blocking writers. The differences are
+    then added to the counters in one short transaction; additions commute with the increments
+    made by concurrent contact changes, which are already reflected in both sides of the check.
+    Each correction is split over all shards, so that a large one, such as the initial count of
+    an existing table, does not pile up in a single row that every later change has to update.
+
+    :param db: Session, the database session
+    :param dry_run: bool, only report differences without fixing them
+    :return: A dictionary mapping every drifted ``(dimension, key)`` to its ``(stored, actual)`` counts
+    """
+    drift = check_stats(db)
+    if dry_run or not drift:
+        return drift
+    deltas = {bucket: actual - stored for bucket, (stored, actual) in drift.items()}
+    # Shards in ascending order, like the row order within a shard, so concurrent writers cannot deadlock.
+    for shard, shard_deltas in sorted(_spread(deltas).items()):
+        _add_counts(db, shard_deltas, shard)
+    db.commit()
+    return drift
@@ -1,8 +1,27 @@
 from sqlalchemy.orm import Session
 from src.database.models import User
+from src.database.upsert import insert_or_ignore, execute_insert_or_ignore
 from fastapi import HTTPException
 
 
+def create_user(email: str, hashed_password: str, db: Session):
+    """
+    Create a new user unless the email is already registered.
+
+    The row is written with ``INSERT ... ON CONFLICT DO NOTHING RETURNING``, so concurrent
+    registrations of the same email produce exactly one user and no integrity errors.
+
+    :param email: str, the email of the new user
+    :param hashed_password: str, the bcrypt hash of the user's password
+    :param db: Session, the database session
+    :return: The ID of the new user, or None if the email is already registered
+    """
+    inserted = execute_insert_or_ignore(db, insert_or_ignore(db, User).returning(User.id),
+                                        {"email": email, "hashed_password": hashed_password})
+    db.commit()
+    return inserted[0] if inserted else None
+
+
 def update_avatar(email: str, avatar_url: str, db: Session):
     """
     Update the avatar of a user identified by email.
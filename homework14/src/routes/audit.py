@@ -0,0 +1,40 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from src.database.db import get_db
+from src.repository.audit import get_audit_log
+from src.schemas import AuditLogResponse, AuditMetricsResponse
+from src.services.audit import audit_writer
+from src.services.auth import get_current_user
+
+# Audit entries contain the changed values of contacts and users, so every endpoint requires a signed-in user.
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+@router.get("/", response_model=List[AuditLogResponse])
+def read_audit_log(entity: str = None, entity_id: int = None, action: str = None, actor: str = None,
+                   since: int = 0, limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    """
+    Retrieve audit entries for contact and user mutations.
+
+    :param entity: str, only entries for this entity type, ``contact`` or ``user``
+    :param entity_id: int, only entries for this entity ID
+    :param action: str, only entries for this action: ``create``, ``update``, ``delete`` or ``restore``
+    :param actor: str, only entries made by this actor
+    :param since: int, only entries with a greater ID are returned
+    :param limit: int, maximum number of entries to return
+    :param db: Session, the database session
+    :return: A list of audit entries ordered by ID
+    """
+    return get_audit_log(db, entity=entity, entity_id=entity_id, action=action, actor=actor, since=since,
+                         limit=limit)
+
+
+@router.get("/metrics", response_model=AuditMetricsResponse)
+def read_audit_metrics():
+    """
+    Report the backlog and the written, dropped and failed counts of the audit writer.
+
+    :return: The audit writer metrics
+    """
+    return audit_writer.metrics()
@@ -1,35 +1,63 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from functools import partial
+from fastapi import APIRouter, HTTPException, Depends, status, Header
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from src.database.db import get_db
 from src.database.models import User
+from src.repository.users import create_user
 from src.schemas import UserCreate, Token
 from src.services.auth import create_access_token, get_password_hash, verify_password
 from src.services.email_verification import send_email
+from src.services.idempotency import idempotent
 
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db), idempotency_key: str = Header(None)):
     """
     Register a new user in the system.
 
+    A retry carrying the same ``Idempotency-Key`` header gets a fresh access token without
+    hashing the password or sending the verification email again; issued tokens are not stored.
+
     :param user: UserCreate, the user data transfer object containing email and password
     :param db: Session, the database session
+    :param idempotency_key: str, optional key identifying retries of the same request
     :return: A token response with the new user's access token
     :raises HTTPException: 409 if email is already registered
     """
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    return await idempotent(db, idempotency_key, "auth:register", user, partial(_register, user, db),
+                            response_model=Token, status_code=status.HTTP_201_CREATED,
+                            replay=lambda: _token(user.email))
+
+
+async def _register(user: UserCreate, db: Session):
+    """
+    Create the user, send the verification email and issue an access token.
+
+    :param user: UserCreate, the user data transfer object containing email and password
+    :param db: Session, the database session
+    :return: A token response with the new user's access token
+    :raises HTTPException: 409 if email is already registered
+    """
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
+    if await run_in_threadpool(create_user, user.email, hashed_password, db) is None:
         raise HTTPException(status_code=409, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
-    db_user = User(email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
     host_url = "http://127.0.0.1:8000/"
     await send_email(user.email, host_url)
-    access_token = create_access_token(data={"sub": user.email})
+    return _token(user.email)
+
+
+def _token(email: str) -> dict:
+    """
+    Issue an access token for a user.
+
+    :param email: str, the email of the user
+    :return: A token response with a new access token
+    """
+    access_token = create_access_token(data={"sub": email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Query
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.orm import Session
 
 from src.database.db import SessionLocal
 from src.repository.contacts import (get_contacts, create_contact, get_contact, update_contact, delete_contact,
-                                     get_contacts_by_search, get_birthdays)
-from src.schemas import ContactCreate, ContactUpdate, ContactResponse
-from typing import List
+                                     get_contacts_by_search, get_birthdays, get_contacts_by_ids, get_changes,
+                                     restore_contact, CONTACT_FIELDS, CONTACT_CONFLICT)
+from src.repository.stats import get_stats
+from src.schemas import (ContactCreate, ContactUpdate, ContactResponse, ContactPartialResponse,
+                         ContactBatchRequest, ContactBatchResponse, ContactChangesResponse,
+                         ContactDuplicateResponse, ContactStatsResponse, BATCH_MAX_IDS)
+from src.services.change_feed import stream_changes
+from src.services.dedupe import find_duplicates
+from src.services.idempotency import idempotent_sync
+from src.conf.config import settings
+from typing import Callable, List, Optional
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -25,31 +34,175 @@ def get_db():
         db.close()
 
 
+def get_session_factory() -> Callable[[], Session]:
+    """
+    Provide the factory used by long-lived endpoints that open a short session per database call.
+
+    :return: The session factory
+    """
+    return SessionLocal
+
+
+def get_fields(fields: str = None) -> Optional[List[str]]:
+    """
+    Parse the comma-separated ``fields`` query parameter into a list of contact columns.
+
+    :param fields: str, comma-separated column names, e.g. ``first_name,last_name``
+    :return: The requested columns, always including ``id``, or None to return every column
+    :raises HTTPException: 400 if an unknown field is requested
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in CONTACT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/minute")
-def create_contact_endpoint(request: Request, contact: ContactCreate, db: Session = Depends(get_db)):
+def create_contact_endpoint(request: Request, contact: ContactCreate, db: Session = Depends(get_db),
+                            idempotency_key: str = Header(None)):
     """
     Endpoint to create a new contact.
 
+    A retry carrying the same ``Idempotency-Key`` header from the same user or client gets the
+    original response.
+
     :param request: Request, the request context
     :param contact: ContactCreate, the schema defining the contact to create
     :param db: Session, the database session
+    :param idempotency_key: str, optional key identifying retries of the same request
     :return: The created contact with HTTP 201 status
     """
-    return create_contact(db, contact)
+    return idempotent_sync(db, idempotency_key, "contacts:create", contact,
+                           lambda: _create_contact(db, contact),
+                           response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
+
+
+def _create_contact(db: Session, contact: ContactCreate):
+    """
+    Create the contact, reporting a taken email or phone number as a conflict.
+
+    :param db: Session, the database session
+    :param contact: ContactCreate, the schema defining the contact to create
+    :return: The created contact
+    :raises HTTPException: 409 if the email or phone number is already used by another contact
+    """
+    created = create_contact(db, contact)
+    if created is None:
+        raise HTTPException(status_code=409, detail=CONTACT_CONFLICT)
+    return created
 
 
-@router.get("/", response_model=List[ContactResponse])
+@router.get("/", response_model=List[ContactPartialResponse], response_model_exclude_unset=True)
 @limiter.limit("5/minute")
-def read_contacts(request: Request, db: Session = Depends(get_db)):
+def read_contacts(request: Request, fields: Optional[List[str]] = Depends(get_fields),
+                  db: Session = Depends(get_db)):
     """
     Retrieve a list of all contacts with optional pagination.
 
     :param request: Request, the request context to access various request-specific data
+    :param fields: list, optional columns to return, parsed from the ``fields`` query parameter
     :param db: Session, the database session
     :return: A list of contacts in the database, subjected to rate limiting
     """
-    return get_contacts(db)
+    return get_contacts(db, fields=fields)
+
+
+@router.get("/batch", response_model=ContactBatchResponse)
+@limiter.limit("5/minute")
+def read_contacts_batch(request: Request, ids: str, db: Session = Depends(get_db)):
+    """
+    Retrieve several contacts in one request by a comma-separated list of IDs.
+
+    :param request: Request, the request context
+    :param ids: str, comma-separated contact IDs, e.g. ``1,2,3``
+    :param db: Session, the database session
+    :return: The found contacts in request order and the IDs that do not exist
+    :raises HTTPException: 400 if an ID is not an integer or more than ``BATCH_MAX_IDS`` IDs are given
+    """
+    try:
+        contact_ids = [int(contact_id) for contact_id in ids.split(",") if contact_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(contact_ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids can be requested at once")
+    contacts, missing = get_contacts_by_ids(db, contact_ids)
+    return {"contacts": contacts, "missing": missing}
+
+
+@router.post("/batch", response_model=ContactBatchResponse)
+@limiter.limit("5/minute")
+def read_contacts_batch_body(request: Request, batch: ContactBatchRequest, db: Session = Depends(get_db)):
+    """
+    Retrieve several contacts in one request, taking the IDs from the request body.
+
+    Use this variant for ID lists too large to fit in a query string.
+
+    :param request: Request, the request context
+    :param batch: ContactBatchRequest, the schema containing at most ``BATCH_MAX_IDS`` contact IDs
+    :param db: Session, the database session
+    :return: The found contacts in request order and the IDs that do not exist
+    """
+    contacts, missing = get_contacts_by_ids(db, batch.ids)
+    return {"contacts": contacts, "missing": missing}
+
+
+@router.get("/stats", response_model=ContactStatsResponse)
+def read_stats(domains: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    """
+    Retrieve contact totals, birthdays per month and the most common email domains.
+
+    The counts come from a summary table kept up to date by every contact mutation.
+
+    :param domains: int, number of most common email domains to return
+    :param db: Session, the database session
+    :return: The contact statistics
+    """
+    return get_stats(db, domains=domains)
+
+
+@router.get("/changes", response_model=ContactChangesResponse)
+def read_changes(since: int = 0, limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    """
+    Retrieve contact mutations recorded after a sequence number, for incremental sync.
+
+    Changes are held back while an earlier sequence number may still be committed, for up to
+    ``CHANGE_FEED_SETTLE_SECONDS``, so passing ``last_seq`` back as ``since`` never skips a change.
+
+    :param since: int, the last sequence number already known to the client
+    :param limit: int, maximum number of changes to return
+    :param db: Session, the database session
+    :return: The changes in order and the sequence number to pass as ``since`` next time
+    """
+    changes = get_changes(db, since=since, limit=limit)
+    return {"changes": changes, "last_seq": changes[-1].seq if changes else since}
+
+
+@router.get("/changes/stream")
+async def stream_changes_endpoint(request: Request, since: int = None, last_event_id: str = Header(None),
+                                  session_factory: Callable[[], Session] = Depends(get_session_factory)):
+    """
+    Stream contact mutations as Server-Sent Events.
+
+    A reconnecting client resumes from its ``Last-Event-ID`` header when ``since`` is not given.
+
+    :param request: Request, the request context
+    :param since: int, the last sequence number already known to the client
+    :param last_event_id: str, the ID of the last event received before reconnecting
+    :param session_factory: callable, creates the session used for each poll of the change log
+    :return: A ``text/event-stream`` response
+    """
+    if since is None:
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    # Content-Encoding: identity keeps the compression middleware from buffering events.
+    return StreamingResponse(
+        stream_changes(request, session_factory, since, settings.CHANGE_FEED_POLL_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
@@ -63,7 +216,26 @@ def read_contact(request: Request, contact_id: int, db: Session = Depends(get_db
     :param db: Session, the database session
     :return: The requested contact or a 404 error if not found
     """
-    return get_contact(db, contact_id)
+    contact = get_contact(db, contact_id)
+    if contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return contact
+
+
+@router.get("/{contact_id}/duplicates", response_model=List[ContactDuplicateResponse])
+def read_contact_duplicates(contact_id: int, db: Session = Depends(get_db)):
+    """
+    Retrieve the likely duplicates of a contact, best match first.
+
+    :param contact_id: int, the unique identifier of the contact
+    :param db: Session, the database session
+    :return: A list of candidate contacts with their similarity scores
+    :raises HTTPException: 404 if the contact does not exist
+    """
+    contact = get_contact(db, contact_id)
+    if contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return [{"contact": duplicate, "score": score} for duplicate, score in find_duplicates(db, contact)]
 
 
 @router.put("/{contact_id}", response_model=ContactResponse)
@@ -75,6 +247,7 @@ def update_contact_endpoint(contact_id: int, contact: ContactUpdate, db: Session
     :param contact: ContactUpdate, the schema instance containing the new data for the contact
     :param db: Session, the database session
     :return: The updated contact, or a 404 error if the contact does not exist
+    :raises HTTPException: 409 if the new email or phone number is already used by another contact
     """
     updated_contact = update_contact(db, contact_id, contact)
     if updated_contact is None:
@@ -96,28 +269,47 @@ def delete_contact_endpoint(contact_id: int, db: Session = Depends(get_db)):
     return {"message": "Contact deleted successfully"}
 
 
-@router.get("/search/")
-def search_contact_endpoint(query: str, db: Session = Depends(get_db)):
+@router.post("/{contact_id}/restore", response_model=ContactResponse)
+def restore_contact_endpoint(contact_id: int, db: Session = Depends(get_db)):
+    """
+    Restore a deleted contact.
+
+    :param contact_id: int, the unique identifier of the contact to be restored
+    :param db: Session, the database session
+    :return: The restored contact, or a 404 error if there is no deleted contact with this ID
+    """
+    contact = restore_contact(db, contact_id)
+    if contact is None:
+        raise HTTPException(status_code=404, detail="Deleted contact not found")
+    return contact
+
+
+@router.get("/search/", response_model=List[ContactPartialResponse], response_model_exclude_unset=True)
+def search_contact_endpoint(query: str, fields: Optional[List[str]] = Depends(get_fields),
+                            db: Session = Depends(get_db)):
     """
     Search for contacts by a query string that matches first name, last name, or email.
 
     :param query: str, the search query string
+    :param fields: list, optional columns to return, parsed from the ``fields`` query parameter
     :param db: Session, the database session
     :return: A list of contacts that match the query
     """
-    contacts = get_contacts_by_search(db, query)
+    contacts = get_contacts_by_search(db, query, fields=fields)
     return contacts
 
 
-@router.get("/birthdays/")
+@router.get("/birthdays/", response_model=List[ContactPartialResponse], response_model_exclude_unset=True)
 @limiter.limit("5/minute")
-def get_birthdays_endpoint(request: Request, db: Session = Depends(get_db)):
+def get_birthdays_endpoint(request: Request, fields: Optional[List[str]] = Depends(get_fields),
+                           db: Session = Depends(get_db)):
     """
     Retrieve contacts who have birthdays within the next week.
 
     :param request: Request, the request context
+    :param fields: list, optional columns to return, parsed from the ``fields`` query parameter
     :param db: Session, the database session
     :return: A list of contacts with upcoming birthdays
     """
-    contacts = get_birthdays(db)
+    contacts = get_birthdays(db, fields=fields)
     return contacts
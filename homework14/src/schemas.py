@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from datetime import date
+from pydantic import BaseModel, EmailStr, Field
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
 
 class ContactCreate(BaseModel):
@@ -8,7 +9,7 @@ class ContactCreate(BaseModel):
     email: EmailStr
     phone_number: str
     birthday: date
-    additional_info: str = None
+    additional_info: Optional[str] = None
 
 
 class ContactUpdate(BaseModel):
@@ -27,6 +28,79 @@ class ContactResponse(ContactCreate):
         orm_mode = True
 
 
+class ContactPartialResponse(BaseModel):
+    id: int
+    first_name: str = None
+    last_name: str = None
+    email: EmailStr = None
+    phone_number: str = None
+    birthday: date = None
+    additional_info: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+BATCH_MAX_IDS = 1000
+
+
+class ContactBatchRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=BATCH_MAX_IDS)
+
+
+class ContactBatchResponse(BaseModel):
+    contacts: List[ContactResponse]
+    missing: List[int]
+
+
+class ContactDuplicateResponse(BaseModel):
+    contact: ContactResponse
+    score: float
+
+
+class ContactChangeResponse(BaseModel):
+    seq: int
+    contact_id: int
+    operation: str
+    data: Optional[dict] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class ContactChangesResponse(BaseModel):
+    changes: List[ContactChangeResponse]
+    last_seq: int
+
+
+class ContactStatsResponse(BaseModel):
+    total: int
+    birthdays_per_month: Dict[int, int]
+    email_domains: Dict[str, int]
+
+
+class AuditLogResponse(BaseModel):
+    id: int
+    actor: Optional[str] = None
+    action: str
+    entity: str
+    entity_id: Optional[int] = None
+    changes: Optional[dict] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class AuditMetricsResponse(BaseModel):
+    running: bool
+    backlog: int
+    written: int
+    dropped: int
+    failed: int
+
+
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,28 @@
+import argparse
+from datetime import timedelta
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.repository.contacts import archive_deleted_contacts, BATCH_CHUNK_SIZE
+
+
+def main():
+    """
+    Command line entry point moving deleted contacts to the archive table, meant to be run from cron::
+
+        python -m src.services.archive
+    """
+    parser = argparse.ArgumentParser(description="Archive deleted contacts.")
+    parser.add_argument("--older-than", type=int, default=settings.CONTACT_ARCHIVE_AFTER_SECONDS,
+                        help="seconds a deleted contact stays in the contacts table")
+    parser.add_argument("--batch-size", type=int, default=BATCH_CHUNK_SIZE, help="contacts moved per batch")
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        archived = archive_deleted_contacts(db, timedelta(seconds=args.older_than), batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Archived {archived} contacts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.database.models import AuditLog, Contact, User
+from src.services.audit_context import AUDIT_ACTION, current_actor
+
+AUDITED_ENTITIES = {Contact: "contact", User: "user"}
+MASKED_FIELDS = {"hashed_password"}
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """
+    Write audit entries from a bounded in-memory queue in multi-row inserts on a background thread.
+
+    A batch is written once ``batch_size`` entries are queued or ``flush_interval`` seconds have
+    passed. Entries arriving while the queue is full are dropped and counted rather than
+    slowing down the request that produced them.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 max_size: int = settings.AUDIT_QUEUE_SIZE, batch_size: int = settings.AUDIT_BATCH_SIZE,
+                 flush_interval: float = settings.AUDIT_FLUSH_SECONDS):
+        self.session_factory = session_factory
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, entry: dict):
+        """
+        Queue an audit entry without blocking.
+
+        :param entry: dict, the column values of the AuditLog row
+        """
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def start(self):
+        """
+        Start the background writer thread.
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the background writer and write every entry still queued.
+
+        :param timeout: float, seconds to wait for the writer thread
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        """
+        Write every queued entry now, in batches of ``batch_size``.
+        """
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def metrics(self) -> dict:
+        """
+        Report the state of the writer.
+
+        :return: A dictionary with the queue backlog and the written, dropped and failed counts
+        """
+        return {
+            "running": self.running,
+            "backlog": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _take_batch(self) -> List[dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+        self.flush()
+
+    def _write(self, batch: List[dict]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+            with self._lock:
+                self.written += len(batch)
+        except Exception as err:
+            db.rollback()
+            with self._lock:
+                self.failed += len(batch)
+            logger.warning("Failed to write %d audit entries: %s", len(batch), err)
+        finally:
+            db.close()
+
+
+audit_writer = AuditWriter()
+
+
+def _entry(action: str, entity: str, entity_id: int, changes: dict) -> dict:
+    for field in MASKED_FIELDS & changes.keys():
+        changes[field] = ["***" if value is not None else None for value in changes[field]]
+    return {
+        "actor": current_actor.get(),
+        "action": action,
+        "entity": entity,
+        "entity_id": entity_id,
+        "changes": jsonable_encoder(changes),
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _diff(obj) -> dict:
+    changes = {}
+    state = inspect(obj)
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.added or history.deleted:
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old != new:
+                changes[attr.key] = [old, new]
+    return changes
+
+
+def _snapshot(obj) -> dict:
+    state = inspect(obj)
+    return {attr.key: [getattr(obj, attr.key), None] for attr in state.mapper.column_attrs}
+
+
+def _action(changes: dict) -> str:
+    # Contacts are soft deleted, so setting or clearing ``deleted_at`` is a delete or a restore.
+    if "deleted_at" not in changes:
+        return "update"
+    return "restore" if changes["deleted_at"][1] is None else "delete"
+
+
+def _pending(session: Session) -> list:
+    return session.info.setdefault("audit_pending", [])
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_flush(session: Session, flush_context):
+    if not audit_writer.running:
+        return
+    for obj in session.new:
+        if type(obj) in AUDITED_ENTITIES:
+            _pending(session).append(_entry("create", AUDITED_ENTITIES[type(obj)], obj.id, _diff(obj)))
+    for obj in session.dirty:
+        if type(obj) in AUDITED_ENTITIES:
+            changes = _diff(obj)
+            if changes:
+                _pending(session).append(_entry(_action(changes), AUDITED_ENTITIES[type(obj)], obj.id, changes))
+    for obj in session.deleted:
+        if type(obj) in AUDITED_ENTITIES:
+            _pending(session).append(_entry("delete", AUDITED_ENTITIES[type(obj)], obj.id, _snapshot(obj)))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _capture_insert(orm_execute_state):
+    # INSERT ... RETURNING statements bypass the unit of work, so they are not seen by after_flush.
+    # Statements re-inserting an existing entity pass their action in the AUDIT_ACTION execution option.
+    if not audit_writer.running or not orm_execute_state.is_insert:
+        return None
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in AUDITED_ENTITIES:
+        return None
+    action = orm_execute_state.execution_options.get(AUDIT_ACTION, "create")
+    values = orm_execute_state.statement.compile().params
+    result = orm_execute_state.invoke_statement().freeze()
+    for row in result().all():
+        entity_id = getattr(row[0], "id", row[0])
+        changes = {key: [None, value] for key, value in values.items() if value is not None}
+        _pending(orm_execute_state.session).append(
+            _entry(action, AUDITED_ENTITIES[mapper.class_], entity_id, changes)
+        )
+    return result()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session):
+    for entry in session.info.pop("audit_pending", []):
+        audit_writer.enqueue(entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session):
+    session.info.pop("audit_pending", None)
@@ -0,0 +1,7 @@
+from contextvars import ContextVar
+
+# Execution option naming the audit action of an INSERT that re-creates an existing entity, e.g. ``restore``.
+AUDIT_ACTION = "audit_action"
+
+# Who is making the current request; set by the audit middleware and read by the audit log and idempotency keys.
+current_actor: ContextVar[str] = ContextVar("current_actor", default=None)
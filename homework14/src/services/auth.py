@@ -1,7 +1,11 @@
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
-from jose import jwt
+from jose import jwt, JWTError
 from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+from src.database.db import get_db
+from src.database.models import User
 
 SECRET_KEY = "asecretkey8394"
 ALGORITHM = "HS256"
@@ -47,6 +51,30 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Resolve the user of the bearer access token, for endpoints that require authentication.
+
+    :param token: str, the access token from the ``Authorization`` header
+    :param db: Session, the database session
+    :return: The authenticated user
+    :raises HTTPException: 401 if the token is invalid or expired, or its user no longer exists
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        email = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        raise credentials_exception
+    user = db.query(User).filter(User.email == email).first() if email else None
+    if user is None:
+        raise credentials_exception
+    return user
+
+
 def create_email_token(data: dict):
     """
     Create a JWT token for email verification purposes.
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date, timedelta
+from fastapi_mail import FastMail, MessageSchema, MessageType
+from fastapi_mail.errors import ConnectionErrors
+from sqlalchemy.orm import Session
+from src.database.db import SessionLocal
+from src.database.models import Contact
+from src.repository.checkpoints import (get_checkpoint, save_checkpoint, get_failures, record_failures,
+                                        clear_failures)
+from src.repository.contacts import get_birthdays_page, get_contacts_by_ids, BATCH_CHUNK_SIZE
+from src.services.email_verification import conf
+
+JOB_NAME = "birthday_reminders"
+
+logger = logging.getLogger(__name__)
+
+
+async def send_birthday_reminder(fm: FastMail, contact: Contact, birthday: date) -> bool:
+    """
+    Send a birthday email to a single contact.
+
+    :param fm: FastMail, the mail client used to send the message
+    :param contact: Contact, the contact whose birthday it is
+    :param birthday: date, the date of the birthday
+    :return: bool, True if the message was sent, False otherwise
+    """
+    try:
+        message = MessageSchema(
+            subject="Happy birthday!",
+            recipients=[contact.email],
+            template_body={"first_name": contact.first_name, "birthday": birthday.strftime("%d %B")},
+            subtype=MessageType.html
+        )
+        await fm.send_message(message, template_name="birthday_template.html")
+        return True
+    except ConnectionErrors as err:
+        logger.warning("Failed to send birthday reminder to contact %s: %s", contact.id, err)
+        return False
+
+
+async def run_birthday_reminders(db: Session, run_date: date = None, days_ahead: int = 0,
+                                 batch_size: int = BATCH_CHUNK_SIZE, concurrency: int = 10,
+                                 fm: FastMail = None) -> dict:
+    """
+    Send birthday reminders to every contact whose birthday is ``days_ahead`` days after ``run_date``.
+
+    Contacts are read in keyset-paginated batches and each batch is dispatched with at most
+    ``concurrency`` messages in flight. Progress is checkpointed after every batch, so a
+    restarted run for the same birthday date resumes after the last processed contact.
+    Contacts whose message could not be sent are recorded with the checkpoint and retried
+    first by the next run for the same birthday date.
+
+    :param db: Session, the database session
+    :param run_date: date, the day of the run, today by default
+    :param days_ahead: int, how many days ahead of the run the birthdays fall
+    :param batch_size: int, number of contacts read per batch
+    :param concurrency: int, maximum number of messages sent at the same time
+    :param fm: FastMail, the mail client, created from the application mail settings by default
+    :return: A dictionary with the sent, failed and retried counts, the last processed ID, and throughput
+    """
+    target = (run_date or date.today()) + timedelta(days=days_ahead)
+    fm = fm or FastMail(conf)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def dispatch(contact: Contact) -> bool:
+        async with semaphore:
+            return await send_birthday_reminder(fm, contact, target)
+
+    sent = failed = 0
+    started = time.monotonic()
+    retry_ids = get_failures(db, JOB_NAME, target)
+    if retry_ids:
+        contacts, missing = get_contacts_by_ids(db, retry_ids)
+        results = await asyncio.gather(*(dispatch(contact) for contact in contacts))
+        sent += sum(results)
+        failed += len(results) - sum(results)
+        delivered = [contact.id for contact, ok in zip(contacts, results) if ok]
+        clear_failures(db, JOB_NAME, target, missing + delivered)
+    last_id = get_checkpoint(db, JOB_NAME, target)
+    while True:
+        contacts = get_birthdays_page(db, target, after_id=last_id, limit=batch_size)
+        if not contacts:
+            break
+        results = await asyncio.gather(*(dispatch(contact) for contact in contacts))
+        sent += sum(results)
+        failed += len(results) - sum(results)
+        last_id = contacts[-1].id
+        record_failures(db, JOB_NAME, target, [contact.id for contact, ok in zip(contacts, results) if not ok])
+        save_checkpoint(db, JOB_NAME, target, last_id)
+        elapsed = time.monotonic() - started
+        logger.info("Processed up to contact %s: %s sent, %s failed, %.1f contacts/s",
+                    last_id, sent, failed, (sent + failed) / elapsed if elapsed else 0)
+    elapsed = time.monotonic() - started
+    return {
+        "sent": sent,
+        "failed": failed,
+        "retried": len(retry_ids),
+        "last_id": last_id,
+        "seconds": elapsed,
+        "per_second": (sent + failed) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    """
+    Command line entry point, meant to be run daily from cron::
+
+        python -m src.services.birthday_reminders --days-ahead 0
+    """
+    parser = argparse.ArgumentParser(description="Send birthday reminders to contacts.")
+    parser.add_argument("--days-ahead", type=int, default=0, help="days between today and the birthdays")
+    parser.add_argument("--batch-size", type=int, default=BATCH_CHUNK_SIZE, help="contacts read per batch")
+    parser.add_argument("--concurrency", type=int, default=10, help="messages sent at the same time")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        stats = asyncio.run(run_birthday_reminders(db, days_ahead=args.days_ahead, batch_size=args.batch_size,
+                                                   concurrency=args.concurrency))
+    finally:
+        db.close()
+    logger.info("Done: %s sent, %s failed in %.1fs (%.1f contacts/s)",
+                stats["sent"], stats["failed"], stats["seconds"], stats["per_second"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable
+from fastapi import Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from src.database.models import ContactChange
+from src.repository.contacts import get_changes
+from src.schemas import ContactChangeResponse
+
+HEARTBEAT_SECONDS = 15
+
+
+def format_event(change: ContactChange) -> str:
+    """
+    Format a contact change as a Server-Sent Event.
+
+    :param change: ContactChange, the change to format
+    :return: str, the event with the sequence number as its ID and the operation as its type
+    """
+    payload = ContactChangeResponse.model_validate(change, from_attributes=True).model_dump_json()
+    return f"id: {change.seq}\nevent: {change.operation}\ndata: {payload}\n\n"
+
+
+def _read_changes(session_factory: Callable[[], Session], since: int):
+    db = session_factory()
+    try:
+        return get_changes(db, since=since)
+    finally:
+        db.close()
+
+
+async def stream_changes(request: Request, session_factory: Callable[[], Session], since: int = 0,
+                         poll_interval: float = 1.0) -> AsyncIterator[str]:
+    """
+    Yield contact changes recorded after ``since`` as Server-Sent Events until the client disconnects.
+
+    The change log is polled with one indexed query per interval, which also picks up changes
+    written by other worker processes. Changes behind a transaction that is still open are held
+    back as described in ``get_changes``, so the stream never skips over them. A comment line is
+    sent when the stream has been idle for a while so that proxies keep the connection open.
+
+    :param request: Request, the request whose connection is streamed to
+    :param session_factory: callable, creates the database session used for each poll
+    :param since: int, the last sequence number already known to the client
+    :param poll_interval: float, seconds to wait when there are no new changes
+    :return: An async iterator of formatted events
+    """
+    last_seq = since
+    last_sent = time.monotonic()
+    while not await request.is_disconnected():
+        changes = await run_in_threadpool(_read_changes, session_factory, last_seq)
+        for change in changes:
+            yield format_event(change)
+            last_seq = change.seq
+        if changes:
+            last_sent = time.monotonic()
+            continue
+        if time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(poll_interval)
@@ -0,0 +1,33 @@
+import argparse
+import sys
+from src.database.db import SessionLocal
+from src.repository.stats import rebuild_stats
+
+
+def main():
+    """
+    Command line entry point recounting the contacts and correcting drifted statistics,
+    meant to be run from cron::
+
+        python -m src.services.contact_stats --check
+
+    Neither mode blocks contact writes. With ``--check`` the summary table is left untouched and
+    the exit status is 1 if it has drifted.
+    """
+    parser = argparse.ArgumentParser(description="Check and rebuild the contact statistics.")
+    parser.add_argument("--check", action="store_true", help="only report drift, do not correct it")
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        drift = rebuild_stats(db, dry_run=args.check)
+    finally:
+        db.close()
+    for (dimension, key), (stored, actual) in sorted(drift.items()):
+        print(f"{dimension} {key!r}: stored {stored}, actual {actual}")
+    print(f"{len(drift)} drifted counters" + ("" if args.check else ", corrected"))
+    if args.check and drift:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+from difflib import SequenceMatcher
+from typing import Iterator, List, Tuple
+from sqlalchemy.orm import Session
+from src.database.db import SessionLocal
+from src.database.models import Contact
+from src.repository.contacts import normalize_contact, BATCH_CHUNK_SIZE
+from src.repository.duplicates import (BLOCKING_KEYS, get_duplicate_candidates, get_blocks, get_block_contacts,
+                                       get_unnormalized_contacts)
+
+DUPLICATE_THRESHOLD = 0.5
+MAX_BLOCK_SIZE = 100
+
+
+def _similarity(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a.strip().lower(), b.strip().lower()).ratio()
+
+
+def score_pair(a: Contact, b: Contact) -> float:
+    """
+    Score how likely two contacts describe the same person.
+
+    :param a: Contact, the first contact
+    :param b: Contact, the second contact
+    :return: float, a score between 0 and 1
+    """
+    score = 0.0
+    if a.email_normalized and a.email_normalized == b.email_normalized:
+        score += 0.3
+    if a.phone_normalized and a.phone_normalized == b.phone_normalized:
+        score += 0.3
+    if a.birthday and a.birthday == b.birthday:
+        score += 0.2
+    score += 0.15 * _similarity(a.first_name, b.first_name) + 0.15 * _similarity(a.last_name, b.last_name)
+    return min(round(score, 4), 1.0)
+
+
+def find_duplicates(db: Session, contact: Contact,
+                    threshold: float = DUPLICATE_THRESHOLD) -> List[Tuple[Contact, float]]:
+    """
+    Find the likely duplicates of a single contact.
+
+    :param db: Session, the database session
+    :param contact: Contact, the contact to find duplicates of
+    :param threshold: float, minimum score for a candidate to be reported
+    :return: A list of (contact, score) pairs, best match first
+    """
+    scored = [(candidate, score_pair(contact, candidate))
+              for candidate in get_duplicate_candidates(db, contact, limit=MAX_BLOCK_SIZE)]
+    return sorted([pair for pair in scored if pair[1] >= threshold], key=lambda pair: -pair[1])
+
+
+def backfill_normalized(db: Session, batch_size: int = BATCH_CHUNK_SIZE) -> int:
+    """
+    Fill in the normalized columns of contacts created before they existed.
+
+    :param db: Session, the database session
+    :param batch_size: int, number of contacts updated per transaction
+    :return: int, the number of contacts processed
+    """
+    processed = last_id = 0
+    while True:
+        contacts = get_unnormalized_contacts(db, after_id=last_id, limit=batch_size)
+        if not contacts:
+            return processed
+        for contact in contacts:
+            normalize_contact(contact)
+        db.commit()
+        processed += len(contacts)
+        last_id = contacts[-1].id
+
+
+def iter_duplicate_pairs(db: Session, threshold: float = DUPLICATE_THRESHOLD,
+                         max_block_size: int = MAX_BLOCK_SIZE) -> Iterator[Tuple[int, int, float]]:
+    """
+    Find likely duplicate pairs across the whole table.
+
+    Only contacts sharing a blocking key (normalized email, normalized phone, or phonetic
+    last name plus birthday) are compared, so the work grows with the size of the blocks
+    rather than the square of the table. Blocks larger than ``max_block_size`` are truncated.
+
+    :param db: Session, the database session
+    :param threshold: float, minimum score for a pair to be reported
+    :param max_block_size: int, maximum number of contacts compared within one block
+    :return: An iterator of (contact ID, duplicate ID, score) tuples, each pair reported once
+    """
+    seen = set()
+    for columns in BLOCKING_KEYS:
+        for key in get_blocks(db, columns):
+            block = get_block_contacts(db, columns, tuple(key), limit=max_block_size)
+            for i, a in enumerate(block):
+                for b in block[i + 1:]:
+                    if (a.id, b.id) in seen:
+                        continue
+                    seen.add((a.id, b.id))
+                    score = score_pair(a, b)
+                    if score >= threshold:
+                        yield a.id, b.id, score
+
+
+def main():
+    """
+    Command line entry point printing duplicate pairs as CSV::
+
+        python -m src.services.dedupe --threshold 0.5 > duplicates.csv
+
+    With ``--normalize-only`` it only fills in the normalized columns, e.g. after a migration.
+    """
+    parser = argparse.ArgumentParser(description="Find likely duplicate contacts.")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD, help="minimum pair score")
+    parser.add_argument("--max-block-size", type=int, default=MAX_BLOCK_SIZE,
+                        help="contacts compared per block")
+    parser.add_argument("--batch-size", type=int, default=BATCH_CHUNK_SIZE,
+                        help="contacts normalized per batch")
+    parser.add_argument("--normalize-only", action="store_true",
+                        help="only normalize, do not look for duplicates")
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        backfill_normalized(db, batch_size=args.batch_size)
+        if args.normalize_only:
+            return
+        print("contact_id,duplicate_id,score")
+        pairs = iter_duplicate_pairs(db, args.threshold, args.max_block_size)
+        for contact_id, duplicate_id, score in pairs:
+            print(f"{contact_id},{duplicate_id},{score}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import hmac
+import inspect
+import json
+import threading
+import time
+from typing import Any, Callable, Optional, Type
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from src.conf.config import settings
+from src.services.audit_context import current_actor
+from src.repository.idempotency import (get_idempotency_key, create_idempotency_key, complete_idempotency_key,
+                                        delete_idempotency_key, purge_expired_idempotency_keys)
+
+POLL_SECONDS = 0.05
+
+_purge_lock = threading.Lock()
+_next_purge = 0.0
+
+
+def request_hash(payload: Any) -> str:
+    """
+    Hash a request body so that a reused key with a different body can be detected.
+
+    The hash is keyed with the application secret because request bodies may contain passwords.
+
+    :param payload: the JSON-compatible request body
+    :return: str, the HMAC-SHA256 hex digest of the canonical JSON encoding
+    """
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True).encode()
+    return hmac.new(settings.SECRET_KEY.encode(), body, hashlib.sha256).hexdigest()
+
+
+def _actor(actor: Optional[str]) -> str:
+    # Keys are looked up per sender, so a key guessed or reused by another client never replays
+    # someone else's response. The audit middleware sets the actor from the bearer token or address.
+    actor = actor if actor is not None else current_actor.get()
+    return actor or ""
+
+
+def _claim(db: Session, key: str, scope: str, actor: str, payload_hash: str) -> bool:
+    """
+    Claim a key, purging expired keys at most once per ``IDEMPOTENCY_PURGE_SECONDS`` in this process.
+
+    :return: bool, True if the key was claimed, False if another request holds it
+    """
+    global _next_purge
+    with _purge_lock:
+        purge = time.monotonic() >= _next_purge
+        if purge:
+            _next_purge = time.monotonic() + settings.IDEMPOTENCY_PURGE_SECONDS
+    if purge:
+        purge_expired_idempotency_keys(db, settings.IDEMPOTENCY_TTL_SECONDS)
+    return create_idempotency_key(db, key, scope, actor, payload_hash)
+
+
+def _stored_response(db: Session, key: str, scope: str, actor: str, payload_hash: str,
+                     replay: Callable = None) -> Optional[JSONResponse]:
+    """
+    Read the response stored for a key.
+
+    :return: The stored response, or None while the original request is still running
+    :raises HTTPException: 409 if the original request failed,
+        422 if the key was used with a different request
+    """
+    stored = get_idempotency_key(db, key, scope, actor)
+    if stored is None:
+        raise HTTPException(status_code=409, detail="The original request with this Idempotency-Key failed")
+    if stored.request_hash != payload_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was used with a different request")
+    if stored.status_code is None:
+        return None
+    if replay is not None and stored.status_code < 400:
+        return JSONResponse(status_code=stored.status_code, content=jsonable_encoder(replay()))
+    return JSONResponse(status_code=stored.status_code, content=stored.response_body)
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+
+
+def _store_error(db: Session, key: str, scope: str, actor: str, err: HTTPException):
+    if err.status_code >= 500:
+        delete_idempotency_key(db, key, scope, actor)
+    else:
+        complete_idempotency_key(db, key, scope, actor, err.status_code, {"detail": err.detail})
+
+
+def _release(db: Session, key: str, scope: str, actor: str):
+    db.rollback()
+    delete_idempotency_key(db, key, scope, actor)
+
+
+def _store_result(db: Session, key: str, scope: str, actor: str, result: Any, response_model: Type[BaseModel],
+                  status_code: int, replay: Callable):
+    if response_model is not None:
+        result = response_model.model_validate(result, from_attributes=True)
+    body = None if replay is not None else jsonable_encoder(result)
+    complete_idempotency_key(db, key, scope, actor, status_code, body)
+    return result
+
+
+def idempotent_sync(db: Session, key: str, scope: str, payload: Any, handler: Callable,
+                    response_model: Type[BaseModel] = None, status_code: int = 200, replay: Callable = None,
+                    actor: str = None):
+    """
+    Run a synchronous request handler at most once per idempotency key.
+
+    Blocking counterpart of ``idempotent`` for endpoints declared with ``def``, which FastAPI
+    already runs in its threadpool.
+
+    :param db: Session, the database session
+    :param key: str, the value of the ``Idempotency-Key`` header, or None to run the handler as usual
+    :param scope: str, the operation the key belongs to, e.g. ``contacts:create``
+    :param payload: the request body, used to reject a reused key with a different request
+    :param handler: callable, runs the request and returns the response content
+    :param response_model: BaseModel, the schema used to serialize the handler result
+    :param status_code: int, the status code of a successful response
+    :param replay: callable, rebuilds the content of a replayed successful response; when given, the
+        content is not stored, which keeps credentials such as access tokens out of the database
+    :param actor: str, the user or client sending the request, ``current_actor`` by default;
+        keys are scoped to it, so different senders never share a key
+    :return: The handler result, or a JSONResponse replaying the stored response
+    :raises HTTPException: 422 if the key was used with a different request,
+        409 if the original request is still running or failed
+    """
+    if not key:
+        return handler()
+    actor = _actor(actor)
+    payload_hash = request_hash(payload)
+    if not _claim(db, key, scope, actor, payload_hash):
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            response = _stored_response(db, key, scope, actor, payload_hash, replay)
+            if response is not None:
+                return response
+            if time.monotonic() >= deadline:
+                raise _in_progress()
+            time.sleep(POLL_SECONDS)
+    try:
+        result = handler()
+    except HTTPException as err:
+        _store_error(db, key, scope, actor, err)
+        raise
+    except Exception:
+        _release(db, key, scope, actor)
+        raise
+    return _store_result(db, key, scope, actor, result, response_model, status_code, replay)
+
+
+async def idempotent(db: Session, key: str, scope: str, payload: Any, handler: Callable,
+                     response_model: Type[BaseModel] = None, status_code: int = 200, replay: Callable = None,
+                     actor: str = None):
+    """
+    Run a request handler at most once per idempotency key.
+
+    The first request with a key runs ``handler`` and stores its response. Retries with the same
+    key get the stored response without running the handler again, and requests arriving while
+    the first one is still running wait for its response. Responses with a 5xx status or an
+    unexpected exception are not stored, so the key can be retried. The database work runs in
+    the threadpool so that it does not block the event loop.
+
+    :param db: Session, the database session
+    :param key: str, the value of the ``Idempotency-Key`` header, or None to run the handler as usual
+    :param scope: str, the operation the key belongs to, e.g. ``contacts:create``
+    :param payload: the request body, used to reject a reused key with a different request
+    :param handler: callable, runs the request and returns the response content; a plain function
+        is run in the threadpool, a coroutine function (or a ``functools.partial`` of one) on the event loop
+    :param response_model: BaseModel, the schema used to serialize the handler result
+    :param status_code: int, the status code of a successful response
+    :param replay: callable, rebuilds the content of a replayed successful response; when given, the
+        content is not stored, which keeps credentials such as access tokens out of the database
+    :param actor: str, the user or client sending the request, ``current_actor`` by default;
+        keys are scoped to it, so different senders never share a key
+    :return: The handler result, or a JSONResponse replaying the stored response
+    :raises HTTPException: 422 if the key was used with a different request,
+        409 if the original request is still running or failed
+    """
+    async def run_handler():
+        if inspect.iscoroutinefunction(handler):
+            return await handler()
+        return await run_in_threadpool(handler)
+
+    if not key:
+        return await run_handler()
+    actor = _actor(actor)
+    payload_hash = request_hash(payload)
+    if not await run_in_threadpool(_claim, db, key, scope, actor, payload_hash):
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            response = await run_in_threadpool(_stored_response, db, key, scope, actor, payload_hash, replay)
+            if response is not None:
+                return response
+            if time.monotonic() >= deadline:
+                raise _in_progress()
+            await asyncio.sleep(POLL_SECONDS)
+    try:
+        result = await run_handler()
+    except HTTPException as err:
+        await run_in_threadpool(_store_error, db, key, scope, actor, err)
+        raise
+    except Exception:
+        await run_in_threadpool(_release, db, key, scope, actor)
+        raise
+    return await run_in_threadpool(_store_result, db, key, scope, actor, result, response_model, status_code,
+                                   replay)
@@ -0,0 +1,76 @@
+import re
+from src.conf.config import settings
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("BFPV", "1"),
+    **dict.fromkeys("CGJKQSXZ", "2"),
+    **dict.fromkeys("DT", "3"),
+    "L": "4",
+    **dict.fromkeys("MN", "5"),
+    "R": "6",
+}
+
+# Stored in ``contacts.normalized_version``; bump it when the rules below change so the backfill
+# re-normalizes every contact. Columns may legitimately stay NULL, e.g. a last name without letters.
+NORMALIZATION_VERSION = 1
+
+
+def normalize_email(email: str):
+    """
+    Normalize an email address for duplicate detection.
+
+    :param email: str, the email address as entered
+    :return: str, the trimmed, lower-cased address, or None if empty
+    """
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def normalize_phone(phone: str, country_code: str = None):
+    """
+    Normalize a phone number to E.164 form on a best-effort basis.
+
+    National numbers starting with a trunk ``0`` and numbers without a country code get the
+    default country code; ``00`` international prefixes are replaced with ``+``.
+
+    :param phone: str, the phone number as entered
+    :param country_code: str, the country code for national numbers, DEFAULT_PHONE_COUNTRY_CODE by default
+    :return: str, the number as ``+<digits>``, or None if it contains no digits
+    """
+    if not phone:
+        return None
+    country_code = country_code or settings.DEFAULT_PHONE_COUNTRY_CODE
+    digits = re.sub(r"\D", "", phone)
+    if not digits:
+        return None
+    if phone.strip().startswith("+"):
+        return "+" + digits
+    if digits.startswith("00"):
+        return "+" + digits[2:]
+    if digits.startswith("0"):
+        return "+" + country_code + digits[1:]
+    if digits.startswith(country_code) and len(digits) > 10:
+        return "+" + digits
+    return "+" + country_code + digits
+
+
+def soundex(name: str):
+    """
+    Compute the American Soundex code of a name.
+
+    :param name: str, the name to encode
+    :return: str, a four-character code such as ``D000``, or None if the name has no letters
+    """
+    letters = re.sub(r"[^A-Z]", "", (name or "").upper())
+    if not letters:
+        return None
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+        if letter not in "HW":
+            previous = digit
+    return (code + "000")[:4]
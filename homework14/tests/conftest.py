@@ -0,0 +1,143 @@
+import os
+import shutil
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.database import db as database
+from src.database.models import Base
+from src.routes import contacts as contacts_routes
+from main import app
+
+
+def worker_id() -> str:
+    """
+    Return the pytest-xdist worker running this process, or ``main`` without xdist.
+    """
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+def _enable_sqlite_savepoints(engine):
+    # pysqlite manages transactions itself and breaks SAVEPOINT; let SQLAlchemy emit BEGIN instead.
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+def create_test_engine(worker: str, url: str = None):
+    """
+    Create the database engine used by one test worker.
+
+    Without ``TEST_DATABASE_URL`` each worker gets a private in-memory SQLite database. With a
+    PostgreSQL URL each worker gets its own schema, selected through ``search_path``.
+
+    :param worker: str, the worker ID, used to name the PostgreSQL schema
+    :param url: str, the database URL, TEST_DATABASE_URL by default
+    :return: The engine
+    """
+    url = url or os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        _enable_sqlite_savepoints(engine)
+        return engine
+    schema = f"test_{worker}"
+    admin = create_engine(url)
+    with admin.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+    admin.dispose()
+    return create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+
+
+@pytest.fixture(scope="session")
+def engine():
+    worker = worker_id()
+    engine = create_test_engine(worker)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA IF EXISTS "test_{worker}" CASCADE'))
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def override_get_db(session):
+    def get_test_db():
+        yield session
+
+    def session_factory():
+        # Each poll gets its own session inside the test transaction; closing it only releases a savepoint.
+        return Session(bind=session.get_bind(), autoflush=False, join_transaction_mode="create_savepoint")
+
+    app.dependency_overrides[database.get_db] = get_test_db
+    app.dependency_overrides[contacts_routes.get_db] = get_test_db
+    app.dependency_overrides[contacts_routes.get_session_factory] = lambda: session_factory
+    yield session
+    app.dependency_overrides.pop(database.get_db, None)
+    app.dependency_overrides.pop(contacts_routes.get_db, None)
+    app.dependency_overrides.pop(contacts_routes.get_session_factory, None)
+
+
+@pytest_asyncio.fixture
+async def client(override_get_db):
+    contacts_routes.limiter.reset()
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+
+
+@pytest.fixture(scope="session")
+def sqlite_template(tmp_path_factory):
+    """
+    SQLite file holding the empty schema, created once per worker and copied for every test.
+    """
+    path = tmp_path_factory.mktemp("template") / "template.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def committed_session_factory(tmp_path, sqlite_template):
+    """
+    Session factory on a throwaway SQLite file, for tests that need real commits across threads.
+    """
+    path = shutil.copyfile(sqlite_template, tmp_path / "test.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_test_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = get_test_db
+    app.dependency_overrides[contacts_routes.get_db] = get_test_db
+    app.dependency_overrides[contacts_routes.get_session_factory] = lambda: factory
+    yield factory
+    app.dependency_overrides.pop(database.get_db, None)
+    app.dependency_overrides.pop(contacts_routes.get_db, None)
+    app.dependency_overrides.pop(contacts_routes.get_session_factory, None)
+    engine.dispose()
@@ -1,69 +1,68 @@
-import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
 import pytest
-from httpx import AsyncClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.database.models import Base, User
-from src.database.db import get_db
+from fastapi.testclient import TestClient
+from src.database.models import User
+from src.services.auth import get_password_hash
 from main import app
 
-root_path = Path(__file__).parent.parent
-sys.path.append(str(root_path))
-
-
-DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base.metadata.create_all(bind=engine)
-
-
-@pytest.fixture
-def session():
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-@pytest.fixture
-async def client(session):
-    async def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
-
-    app.dependency_overrides[get_db] = override_get_db
-    async with AsyncClient(app=app, base_url="http://test") as ac:
-        yield ac
-
 
 @pytest.mark.asyncio
 async def test_register_user(client):
-    response = await client.post(
-        "/register",
-        json={"email": "test@example.com", "password": "strongpassword"}
-    )
+    with patch("src.routes.auth.send_email", new=AsyncMock()):
+        response = await client.post(
+            "/auth/register",
+            json={"email": "test@example.com", "password": "strongpassword"}
+        )
     assert response.status_code == 201
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
 
 
+def test_register_concurrent_same_email(committed_session_factory):
+    client = TestClient(app)
+    with patch("src.routes.auth.send_email", new=AsyncMock()):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(
+                lambda _: client.post("/auth/register", json={"email": "race@example.com", "password": "pw"}),
+                range(8)
+            ))
+    status_codes = [response.status_code for response in responses]
+    assert status_codes.count(201) == 1
+    assert status_codes.count(409) == 7
+    db = committed_session_factory()
+    try:
+        assert db.query(User).filter(User.email == "race@example.com").count() == 1
+    finally:
+        db.close()
+
+
 @pytest.mark.asyncio
 async def test_login(client, session):
-    user = User(email="user@example.com", hashed_password="$2b$12$KxsqLJpo3CwD/4uJYRXY5OzUjmFwh6owSu3Z4RjIj2kP3wr.7LkE6")  # bcrypt hash for "password"
+    user = User(email="user@example.com", hashed_password=get_password_hash("password"))
     session.add(user)
     session.commit()
     response = await client.post(
-        "/login",
+        "/auth/login",
         json={"email": "user@example.com", "password": "password"}
     )
     assert response.status_code == 201
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+
+
+@pytest.mark.asyncio
+async def test_audit_log_requires_authentication(client, session):
+    session.add(User(email="auditor@example.com", hashed_password=get_password_hash("password")))
+    session.commit()
+    assert (await client.get("/audit/")).status_code == 401
+    assert (await client.get("/audit/metrics")).status_code == 401
+    invalid = await client.get("/audit/", headers={"Authorization": "Bearer invalid"})
+    assert invalid.status_code == 401
+    login = await client.post("/auth/login", json={"email": "auditor@example.com", "password": "password"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    response = await client.get("/audit/", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from main import app
+from src.routes.contacts import get_session_factory, stream_changes_endpoint
+
+CONTACT = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "email": "john.doe@example.com",
+    "phone_number": "1234567890",
+    "birthday": "1990-01-02",
+}
+
+
+@pytest.mark.asyncio
+async def test_create_contact(client):
+    response = await client.post("/contacts/", json=CONTACT)
+    assert response.status_code == 201
+    assert response.json()["email"] == CONTACT["email"]
+
+
+@pytest.mark.asyncio
+async def test_create_contact_conflict(client):
+    assert (await client.post("/contacts/", json=CONTACT)).status_code == 201
+    response = await client.post("/contacts/", json=CONTACT)
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_read_contacts_with_fields(client):
+    await client.post("/contacts/", json=CONTACT)
+    response = await client.get("/contacts/", params={"fields": "first_name"})
+    assert response.status_code == 200
+    assert [set(contact) for contact in response.json()] == [{"id", "first_name"}]
+
+
+@pytest.mark.asyncio
+async def test_read_contacts_batch(client):
+    contact_id = (await client.post("/contacts/", json=CONTACT)).json()["id"]
+    response = await client.get("/contacts/batch", params={"ids": f"{contact_id},{contact_id + 100}"})
+    assert response.status_code == 200
+    assert [contact["id"] for contact in response.json()["contacts"]] == [contact_id]
+    assert response.json()["missing"] == [contact_id + 100]
+
+
+@pytest.mark.asyncio
+async def test_read_contacts_batch_too_many_ids(client):
+    ids = list(range(1, 1002))
+    assert (await client.get("/contacts/batch", params={"ids": ",".join(map(str, ids))})).status_code == 400
+    assert (await client.post("/contacts/batch", json={"ids": ids})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_delete_and_restore_contact(client):
+    contact_id = (await client.post("/contacts/", json=CONTACT)).json()["id"]
+    assert (await client.delete(f"/contacts/{contact_id}")).status_code == 200
+    assert (await client.get(f"/contacts/{contact_id}")).status_code == 404
+    assert (await client.post("/contacts/", json=CONTACT)).status_code == 409
+    response = await client.post(f"/contacts/{contact_id}/restore")
+    assert response.status_code == 200
+    assert (await client.get(f"/contacts/{contact_id}")).json()["email"] == CONTACT["email"]
+
+
+@pytest.mark.asyncio
+async def test_read_stats(client):
+    await client.post("/contacts/", json=CONTACT)
+    response = await client.get("/contacts/stats")
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert response.json()["birthdays_per_month"]["1"] == 1
+    assert response.json()["email_domains"] == {"example.com": 1}
+
+
+@pytest.mark.asyncio
+async def test_stream_changes_uses_session_factory_dependency(client):
+    await client.post("/contacts/", json=CONTACT)
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+    factory = app.dependency_overrides[get_session_factory]()
+    response = await stream_changes_endpoint(request, since=0, session_factory=factory)
+    events = [event async for event in response.body_iterator]
+    assert events[0].startswith("id: ")
+    assert "event: create" in events[0]
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock
+from datetime import date
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.pool import StaticPool
+
+from src.database.backfill import backfill, create_index_concurrently, _save_checkpoint
+from src.database.models import Base, Contact, JobCheckpoint
+
+contacts = Contact.__table__
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.connection = self.engine.connect()
+        self.connection.execute(contacts.insert(), [
+            {"first_name": "John", "last_name": "Doe", "email": f"John{i}@Example.com",
+             "phone_number": str(i), "birthday": date(1990, 1, 2)}
+            for i in range(25)
+        ])
+        self.connection.commit()
+        self.values = {"email_normalized": func.lower(contacts.c.email)}
+
+    def tearDown(self):
+        self.connection.close()
+        self.engine.dispose()
+
+    def normalized(self):
+        query = select(contacts.c.email_normalized).order_by(contacts.c.id)
+        return self.connection.execute(query).scalars().all()
+
+    def test_backfill(self):
+        updated = backfill(self.connection, contacts, self.values,
+                           where=contacts.c.email_normalized.is_(None), batch_size=10, pause=0)
+        self.assertEqual(updated, 25)
+        self.assertEqual(self.normalized()[0], "john0@example.com")
+        self.assertNotIn(None, self.normalized())
+        self.assertEqual(self.connection.execute(select(func.count()).select_from(JobCheckpoint)).scalar(), 0)
+
+    def test_backfill_resumes_from_checkpoint(self):
+        _save_checkpoint(self.connection, "backfill:contacts", 10)
+        self.connection.commit()
+        updated = backfill(self.connection, contacts, self.values, batch_size=10, pause=0)
+        self.assertEqual(updated, 15)
+        self.assertEqual(self.normalized()[:10], [None] * 10)
+        self.assertNotIn(None, self.normalized()[10:])
+
+    def test_backfill_in_autocommit_block(self):
+        # Alembic's autocommit block holds a transaction on the connection and commits it on exit.
+        connection = self.connection.execution_options(isolation_level="AUTOCOMMIT")
+        with connection.begin():
+            self.assertEqual(backfill(connection, contacts, self.values, batch_size=10, pause=0), 25)
+        self.assertNotIn(None, self.normalized())
+
+
+class TestCreateIndexConcurrently(unittest.TestCase):
+
+    def test_postgresql(self):
+        op = MagicMock()
+        op.get_bind.return_value.dialect.name = "postgresql"
+        create_index_concurrently(op, "ix_contacts_email_normalized", "contacts", ["email_normalized"])
+        op.get_context.return_value.autocommit_block.assert_called_once()
+        op.create_index.assert_called_once_with("ix_contacts_email_normalized", "contacts",
+                                                ["email_normalized"], postgresql_concurrently=True,
+                                                if_not_exists=True)
+
+    def test_other_database(self):
+        op = MagicMock()
+        op.get_bind.return_value.dialect.name = "sqlite"
+        create_index_concurrently(op, "ix_contacts_email_normalized", "contacts", ["email_normalized"])
+        op.get_context.return_value.autocommit_block.assert_not_called()
+        op.create_index.assert_called_once_with("ix_contacts_email_normalized", "contacts",
+                                                ["email_normalized"], if_not_exists=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
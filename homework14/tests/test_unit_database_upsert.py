@@ -0,0 +1,40 @@
+import unittest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, User
+from src.database.upsert import insert_or_ignore, execute_insert_or_ignore
+
+
+class TestInsertOrIgnore(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def insert(self, rows):
+        return execute_insert_or_ignore(self.db, insert_or_ignore(self.db, User).returning(User.email), rows)
+
+    def test_on_conflict_skips_taken_rows(self):
+        self.assertEqual(self.insert({"email": "a@b.com", "hashed_password": "x"}), ["a@b.com"])
+        self.assertEqual(self.insert({"email": "a@b.com", "hashed_password": "y"}), [])
+
+    def test_fallback_without_on_conflict(self):
+        with patch("src.database.upsert.supports_on_conflict", return_value=False):
+            self.assertNotIn("ON CONFLICT", str(insert_or_ignore(self.db, User)))
+            self.assertEqual(self.insert({"email": "a@b.com", "hashed_password": "x"}), ["a@b.com"])
+            rows = [{"email": "a@b.com", "hashed_password": "y"}, {"email": "c@d.com", "hashed_password": "z"}]
+            self.assertEqual(self.insert(rows), ["c@d.com"])
+        self.db.commit()
+        self.assertEqual(self.db.query(User).count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock
+from datetime import date
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+
+from src.database.models import JobCheckpoint
+from src.repository.checkpoints import (get_checkpoint, save_checkpoint, get_failures, record_failures,
+                                        clear_failures)
+
+
+class TestCheckpointsRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock(spec=Session)
+        self.db.get_bind.return_value.dialect.name = "sqlite"
+        self.run_date = date(2024, 4, 22)
+        self.checkpoint = JobCheckpoint(name="job", run_date=self.run_date, last_id=42)
+
+    def test_get_checkpoint_same_run(self):
+        self.db.query().filter().first.return_value = self.checkpoint
+        self.assertEqual(get_checkpoint(self.db, "job", self.run_date), 42)
+
+    def test_get_checkpoint_other_run(self):
+        self.db.query().filter().first.return_value = self.checkpoint
+        self.assertEqual(get_checkpoint(self.db, "job", date(2024, 4, 23)), 0)
+
+    def test_get_checkpoint_not_found(self):
+        self.db.query().filter().first.return_value = None
+        self.assertEqual(get_checkpoint(self.db, "job", self.run_date), 0)
+
+    def test_save_checkpoint_existing(self):
+        self.db.query().filter().first.return_value = self.checkpoint
+        checkpoint = save_checkpoint(self.db, "job", date(2024, 4, 23), 7)
+        self.db.add.assert_not_called()
+        self.db.commit.assert_called_once()
+        self.assertEqual(checkpoint.run_date, date(2024, 4, 23))
+        self.assertEqual(checkpoint.last_id, 7)
+
+    def test_save_checkpoint_new(self):
+        self.db.query().filter().first.return_value = None
+        checkpoint = save_checkpoint(self.db, "job", self.run_date, 7)
+        self.db.add.assert_called_once_with(checkpoint)
+        self.db.commit.assert_called_once()
+        self.assertEqual(checkpoint.last_id, 7)
+
+    def test_get_failures(self):
+        rows = [MagicMock(contact_id=3), MagicMock(contact_id=8)]
+        self.db.query().filter().order_by().all.return_value = rows
+        self.assertEqual(get_failures(self.db, "job", self.run_date), [3, 8])
+
+    def test_record_failures(self):
+        record_failures(self.db, "job", self.run_date, [3, 8])
+        statement = self.db.execute.call_args.args[0]
+        self.assertIn("ON CONFLICT DO NOTHING", str(statement.compile(dialect=sqlite.dialect())))
+        self.db.commit.assert_not_called()
+
+    def test_record_failures_empty(self):
+        record_failures(self.db, "job", self.run_date, [])
+        self.db.execute.assert_not_called()
+
+    def test_clear_failures(self):
+        clear_failures(self.db, "job", self.run_date, [3])
+        self.db.query().filter().delete.assert_called_once_with(synchronize_session=False)
+        self.db.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
 import unittest
-from unittest.mock import MagicMock
-from datetime import date
-from sqlalchemy.orm import Session
+from unittest.mock import MagicMock, patch
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
-from src.database.models import Contact
+from src.database.models import Base, Contact, ContactChange, ContactArchive
 from src.schemas import ContactCreate, ContactUpdate
 from src.repository.contacts import (
     get_contact,
@@ -12,7 +17,12 @@ from src.repository.contacts import (
     update_contact,
     delete_contact,
     get_contacts_by_search,
-    get_birthdays
+    get_birthdays,
+    get_contacts_by_ids,
+    get_birthdays_page,
+    get_changes,
+    restore_contact,
+    archive_deleted_contacts
 )
 
 
@@ -20,6 +30,7 @@ class TestContactsRepository(unittest.TestCase):
 
     def setUp(self):
         self.db = MagicMock(spec=Session)
+        self.db.get_bind.return_value.dialect.name = "sqlite"
         self.contact_data_create = ContactCreate(
             first_name="John",
             last_name="Doe",
@@ -53,47 +64,149 @@ class TestContactsRepository(unittest.TestCase):
         contact = get_contact(db=self.db, contact_id=99)
         self.assertIsNone(contact)
 
+    def test_get_contacts_by_ids(self):
+        other = Contact(id=3, first_name="Jane", last_name="Doe")
+        self.db.query().filter().all.return_value = [self.contact, other]
+        contacts, missing = get_contacts_by_ids(db=self.db, contact_ids=[3, 99, 1, 3])
+        self.assertEqual(contacts, [other, self.contact])
+        self.assertEqual(missing, [99])
+
+    def test_get_contacts_by_ids_chunked(self):
+        self.db.query().filter().all.side_effect = [[self.contact], []]
+        contacts, missing = get_contacts_by_ids(db=self.db, contact_ids=[1, 2, 3], chunk_size=2)
+        self.assertEqual(self.db.query().filter().all.call_count, 2)
+        self.assertEqual(contacts, [self.contact])
+        self.assertEqual(missing, [2, 3])
+
     def test_get_contacts(self):
-        self.db.query().offset().limit().all.return_value = [self.contact]
+        self.db.query().filter().offset().limit().all.return_value = [self.contact]
         contacts = get_contacts(db=self.db, skip=0, limit=10)
         self.assertTrue(self.db.query.called)
         self.assertEqual(contacts, [self.contact])
 
+    def test_get_contacts_with_fields(self):
+        row = MagicMock()
+        row._asdict.return_value = {"id": 1, "first_name": "John"}
+        self.db.query().filter().offset().limit().all.return_value = [row]
+        contacts = get_contacts(db=self.db, skip=0, limit=10, fields=["id", "first_name"])
+        self.db.query.assert_called_with(Contact.id, Contact.first_name)
+        self.assertEqual(contacts, [{"id": 1, "first_name": "John"}])
+
     def test_create_contact(self):
         self.db.add = MagicMock()
         self.db.commit = MagicMock()
         self.db.refresh = MagicMock()
+        self.db.execute.return_value.scalars.return_value.all.return_value = [self.contact]
         contact = create_contact(db=self.db, contact_data=self.contact_data_create)
-        self.db.add.assert_called_once()
+        self.assertEqual(contact, self.contact)
+        statement = self.db.execute.call_args_list[0].args[0]
+        self.assertEqual(statement.compile().params["email_normalized"], "john.doe@example.com")
+        self.assertIn("ON CONFLICT DO NOTHING", str(statement.compile(dialect=sqlite.dialect())))
+        change = self.db.add.call_args.args[0]
+        self.assertIsInstance(change, ContactChange)
+        self.assertEqual(change.operation, "create")
+        self.assertEqual(change.data["email"], "john.doe@example.com")
         self.db.commit.assert_called_once()
         self.db.refresh.assert_called_once()
 
+    def test_create_contact_conflict(self):
+        self.db.execute.return_value.scalars.return_value.all.return_value = []
+        contact = create_contact(db=self.db, contact_data=self.contact_data_create)
+        self.assertIsNone(contact)
+        self.db.add.assert_not_called()
+        self.db.commit.assert_not_called()
+        self.db.rollback.assert_called_once()
+
     def test_update_contact_found(self):
         self.db.query().filter().first.return_value = self.contact
         updated_contact = update_contact(db=self.db, contact_id=1, contact_data=self.contact_data_update)
         self.assertIsNotNone(updated_contact)
         self.db.commit.assert_called_once()
         self.assertEqual(updated_contact.first_name, "Jane")
+        change = self.db.add.call_args.args[0]
+        self.assertEqual(change.operation, "update")
+        self.assertEqual(change.data["first_name"], "Jane")
 
     def test_update_contact_not_found(self):
         self.db.query().filter().first.return_value = None
         updated_contact = update_contact(db=self.db, contact_id=99, contact_data=self.contact_data_update)
         self.assertIsNone(updated_contact)
 
+    def test_update_contact_conflict(self):
+        self.db.query().filter().first.return_value = self.contact
+        self.db.commit.side_effect = IntegrityError("UPDATE contacts", {}, Exception("UNIQUE"))
+        with self.assertRaises(HTTPException) as context:
+            update_contact(db=self.db, contact_id=1, contact_data=ContactUpdate(email="taken@example.com"))
+        self.assertEqual(context.exception.status_code, 409)
+        self.db.rollback.assert_called_once()
+
     def test_delete_contact_found(self):
         self.db.query().filter().first.return_value = self.contact
         self.db.delete = MagicMock()
         self.db.commit = MagicMock()
         result = delete_contact(db=self.db, contact_id=1)
-        self.db.delete.assert_called_once()
+        self.db.delete.assert_not_called()
+        self.assertIsNotNone(self.contact.deleted_at)
+        change = self.db.add.call_args.args[0]
+        self.assertEqual((change.contact_id, change.operation, change.data), (1, "delete", None))
         self.db.commit.assert_called_once()
         self.assertTrue(result)
 
+    def test_restore_contact_deleted(self):
+        self.contact.deleted_at = datetime.utcnow()
+        self.db.query().filter().first.return_value = self.contact
+        result = restore_contact(db=self.db, contact_id=1)
+        self.assertIsNone(result.deleted_at)
+        change = self.db.add.call_args.args[0]
+        self.assertEqual((change.contact_id, change.operation), (1, "restore"))
+        self.db.commit.assert_called_once()
+
+    def test_restore_contact_not_found(self):
+        self.db.query().filter().first.return_value = None
+        self.assertIsNone(restore_contact(db=self.db, contact_id=99))
+        self.db.commit.assert_not_called()
+
+    def test_archive_deleted_contacts(self):
+        self.db.scalars().all.side_effect = [[1, 2], [3], []]
+        self.db.execute.side_effect = [MagicMock(rowcount=2), MagicMock(), MagicMock(rowcount=1), MagicMock()]
+        archived = archive_deleted_contacts(db=self.db, older_than=timedelta(days=1), batch_size=2)
+        self.assertEqual(archived, 3)
+        self.assertEqual(self.db.commit.call_count, 2)
+
+    def test_archive_deleted_contacts_postgresql(self):
+        self.db.get_bind.return_value.dialect.name = "postgresql"
+        self.db.scalars().all.side_effect = [[1, 2], []]
+        self.db.execute.return_value.rowcount = 2
+        archive_deleted_contacts(db=self.db, older_than=timedelta(days=1))
+        self.db.execute.assert_called_once()
+        sql = str(self.db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        self.assertIn("WITH moved AS", sql)
+        self.assertIn("deleted_at IS NOT NULL", sql)
+
     def test_delete_contact_not_found(self):
         self.db.query().filter().first.return_value = None
         result = delete_contact(db=self.db, contact_id=99)
         self.assertFalse(result)
 
+    def test_get_changes(self):
+        change = ContactChange(seq=5, contact_id=1, operation="create")
+        self.db.query().filter().order_by().limit().all.return_value = [change]
+        changes = get_changes(db=self.db, since=4, limit=10)
+        self.assertEqual(changes, [change])
+
+    def test_get_changes_holds_back_after_gap(self):
+        now = datetime.utcnow()
+        changes = [ContactChange(seq=seq, contact_id=1, operation="create", created_at=now)
+                   for seq in (5, 6, 8, 9)]
+        self.db.query().filter().order_by().limit().all.return_value = changes
+        self.assertEqual(get_changes(db=self.db, since=4, settle_seconds=5), changes[:2])
+
+    def test_get_changes_skips_settled_gap(self):
+        old = datetime.utcnow() - timedelta(seconds=10)
+        changes = [ContactChange(seq=seq, contact_id=1, operation="create", created_at=old) for seq in (5, 7)]
+        self.db.query().filter().order_by().limit().all.return_value = changes
+        self.assertEqual(get_changes(db=self.db, since=4, settle_seconds=5), changes)
+
     def test_get_contacts_by_search(self):
         self.db.query().filter().all.return_value = [self.contact]
         contacts = get_contacts_by_search(db=self.db, query="Doe")
@@ -104,6 +217,83 @@ class TestContactsRepository(unittest.TestCase):
         contacts = get_birthdays(db=self.db)
         self.assertEqual(contacts, [self.contact])
 
+    def test_get_birthdays_page(self):
+        self.db.query().filter().order_by().limit().all.return_value = [self.contact]
+        contacts = get_birthdays_page(db=self.db, target=date.today(), after_id=0, limit=10)
+        self.assertEqual(contacts, [self.contact])
+
+    def test_get_birthdays_with_fields(self):
+        row = MagicMock()
+        row._asdict.return_value = {"id": 1, "birthday": date.today()}
+        self.db.query().filter().all.return_value = [row]
+        contacts = get_birthdays(db=self.db, fields=["id", "birthday"])
+        self.db.query.assert_called_with(Contact.id, Contact.birthday)
+        self.assertEqual(contacts, [{"id": 1, "birthday": date.today()}])
+
+
+class TestArchiveDeletedContacts(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.ids = []
+        for i in range(2):
+            contact = create_contact(self.db, ContactCreate(first_name="John", last_name="Doe",
+                                                            email=f"john{i}@example.com", phone_number=str(i),
+                                                            birthday=date(1990, 1, 2)))
+            self.ids.append(contact.id)
+            delete_contact(self.db, contact.id)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_contact_restored_during_sweep_is_not_archived(self):
+        scalars = self.db.scalars
+
+        def restore_after_select(statement, *args, **kwargs):
+            ids = scalars(statement, *args, **kwargs).all()
+            if ids and get_contact(self.db, self.ids[0]) is None:
+                restore_contact(self.db, self.ids[0])
+            return MagicMock(all=MagicMock(return_value=ids))
+
+        with patch.object(self.db, "scalars", side_effect=restore_after_select):
+            archived = archive_deleted_contacts(self.db, older_than=timedelta(0))
+        self.assertEqual(archived, 1)
+        self.assertIsNotNone(get_contact(self.db, self.ids[0]))
+        self.assertEqual([row.id for row in self.db.query(ContactArchive).all()], [self.ids[1]])
+
+
+class TestBirthdayIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.capture)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def capture(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def plan(self):
+        statement, parameters = self.statements[-1]
+        with self.engine.connect() as connection:
+            rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return " ".join(row[-1] for row in rows)
+
+    def test_birthday_queries_use_live_birthday_index(self):
+        get_birthdays_page(self.db, date(2024, 2, 28))
+        self.assertIn("ix_contacts_live_birthday_key", self.plan())
+        get_birthdays(self.db)
+        self.assertIn("ix_contacts_live_birthday_key", self.plan())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.conf.config import settings
+from src.database.models import Base, Contact, ContactStat
+from src.schemas import ContactCreate, ContactUpdate
+from src.repository.contacts import create_contact, update_contact, delete_contact, restore_contact
+from src.repository.stats import contact_buckets, get_stats, rebuild_stats
+
+
+class TestStatsRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.ids = [
+            create_contact(self.db, ContactCreate(first_name="John", last_name="Doe", email=email,
+                                                  phone_number=str(i), birthday=birthday)).id
+            for i, (email, birthday) in enumerate([("john@Example.com", date(1990, 1, 2)),
+                                                     ("jane@example.com", date(1991, 3, 4)),
+                                                     ("jim@other.org", date(1992, 3, 5))])
+        ]
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_contact_buckets(self):
+        contact = Contact(email="John@Example.COM", birthday=date(1990, 12, 1))
+        self.assertEqual(contact_buckets(contact),
+                         [("total", ""), ("birth_month", "12"), ("email_domain", "example.com")])
+
+    def test_create_updates_stats(self):
+        stats = get_stats(self.db)
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual((stats["birthdays_per_month"][1], stats["birthdays_per_month"][3]), (1, 2))
+        self.assertEqual(stats["email_domains"], {"example.com": 2, "other.org": 1})
+
+    def test_update_delete_restore_update_stats(self):
+        update_contact(self.db, self.ids[1], ContactUpdate(email="jane@other.org", birthday=date(1991, 7, 4)))
+        delete_contact(self.db, self.ids[0])
+        stats = get_stats(self.db, domains=1)
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(stats["birthdays_per_month"][7], 1)
+        self.assertEqual(stats["email_domains"], {"other.org": 2})
+        restore_contact(self.db, self.ids[0])
+        self.assertEqual(get_stats(self.db)["email_domains"], {"other.org": 2, "example.com": 1})
+        self.assertEqual(rebuild_stats(self.db, dry_run=True), {})
+
+    def test_counters_without_on_conflict(self):
+        with patch("src.database.upsert.supports_on_conflict", return_value=False), \
+                patch("src.repository.stats.supports_on_conflict", return_value=False):
+            create_contact(self.db, ContactCreate(first_name="Jo", last_name="Doe", email="jo@example.com",
+                                                  phone_number="9", birthday=date(1993, 3, 6)))
+            delete_contact(self.db, self.ids[2])
+        stats = get_stats(self.db)
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(stats["birthdays_per_month"][3], 2)
+        self.assertEqual(stats["email_domains"], {"example.com": 3})
+
+    def test_counters_are_sharded_by_contact(self):
+        shards = self.db.query(ContactStat.shard).filter(ContactStat.dimension == "total").all()
+        expected = sorted(i % settings.CONTACT_STATS_SHARDS for i in self.ids)
+        self.assertEqual(sorted(row.shard for row in shards), expected)
+
+    def test_check_stats_only_reads(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        self.db.add(ContactStat(dimension="total", key="", shard=99, count=7))
+        self.db.commit()
+        statements.clear()
+        self.assertEqual(rebuild_stats(self.db, dry_run=True), {("total", ""): (10, 3)})
+        self.assertTrue(statements)
+        self.assertTrue(all(statement.startswith("SELECT") for statement in statements))
+
+    def test_rebuild_stats(self):
+        self.db.add(ContactStat(dimension="total", key="", shard=99, count=7))
+        self.db.query(ContactStat).filter(ContactStat.key == "other.org").delete()
+        self.db.commit()
+        drift = rebuild_stats(self.db, dry_run=True)
+        self.assertEqual(drift, {("total", ""): (10, 3), ("email_domain", "other.org"): (0, 1)})
+        self.assertEqual(get_stats(self.db)["total"], 10)
+        self.assertEqual(rebuild_stats(self.db), drift)
+        self.assertEqual(get_stats(self.db)["total"], 3)
+        self.assertEqual(rebuild_stats(self.db, dry_run=True), {})
+
+    def test_rebuild_stats_spreads_corrections_over_shards(self):
+        self.db.query(ContactStat).delete()
+        self.db.commit()
+        self.db.add_all([Contact(first_name="Jo", last_name="Doe", email=f"jo{i}@example.com")
+                         for i in range(40)])
+        self.db.commit()
+        rebuild_stats(self.db)
+        counts = [row.count for row in self.db.query(ContactStat).filter(ContactStat.dimension == "total")]
+        self.assertEqual(sum(counts), 43)
+        self.assertEqual(len(counts), settings.CONTACT_STATS_SHARDS)
+        self.assertLessEqual(max(counts) - min(counts), 1)
@@ -2,7 +2,7 @@ import unittest
 from unittest.mock import MagicMock
 from sqlalchemy.orm import Session
 from src.database.models import User
-from src.repository.users import update_avatar
+from src.repository.users import update_avatar, create_user
 from fastapi import HTTPException
 
 
@@ -10,9 +10,21 @@ class TestUserRepository(unittest.TestCase):
 
     def setUp(self):
         self.db = MagicMock(spec=Session)
+        self.db.get_bind.return_value.dialect.name = "postgresql"
         self.email = "user@example.com"
         self.new_avatar_url = "http://example.com/new-avatar.jpg"
 
+    def test_create_user(self):
+        self.db.execute.return_value.scalars.return_value.all.return_value = [1]
+        user_id = create_user(self.email, "hashed", self.db)
+        self.assertEqual(user_id, 1)
+        self.assertIn("ON CONFLICT DO NOTHING RETURNING", str(self.db.execute.call_args.args[0]))
+        self.db.commit.assert_called_once()
+
+    def test_create_user_conflict(self):
+        self.db.execute.return_value.scalars.return_value.all.return_value = []
+        self.assertIsNone(create_user(self.email, "hashed", self.db))
+
     def test_update_avatar_user_found(self):
         user = User(email=self.email, avatar_url="http://example.com/old-avatar.jpg")
         self.db.query.return_value.filter.return_value.first.return_value = user
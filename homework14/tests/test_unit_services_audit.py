@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import patch
+from datetime import date, timedelta
+import pytest
+
+from src.database.models import AuditLog, Contact
+from src.schemas import ContactCreate, ContactUpdate
+from src.repository.contacts import (create_contact, update_contact, delete_contact, restore_contact,
+                                     archive_deleted_contacts)
+from src.services.audit import AuditWriter
+from src.services.audit_context import current_actor
+
+JOHN = ContactCreate(first_name="John", last_name="Doe", email="john@example.com", phone_number="123",
+                     birthday=date(1990, 1, 2))
+
+
+class TestAudit(unittest.TestCase):
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, committed_session_factory):
+        self.Session = committed_session_factory
+        self.writer = AuditWriter(self.Session, max_size=10, batch_size=2, flush_interval=0.05)
+        with patch("src.services.audit.audit_writer", self.writer):
+            yield
+        self.writer.stop()
+
+    def entries(self):
+        db = self.Session()
+        try:
+            return [(entry.actor, entry.action, entry.entity, entry.changes)
+                    for entry in db.query(AuditLog).order_by(AuditLog.id).all()]
+        finally:
+            db.close()
+
+    def test_captures_contact_mutations(self):
+        self.writer.start()
+        token = current_actor.set("admin@example.com")
+        db = self.Session()
+        try:
+            contact = create_contact(db, JOHN)
+            update_contact(db, contact.id, ContactUpdate(first_name="Jane"))
+            delete_contact(db, contact.id)
+        finally:
+            db.close()
+            current_actor.reset(token)
+        self.writer.stop()
+        entries = self.entries()
+        self.assertEqual([entry[1] for entry in entries], ["create", "update", "delete"])
+        self.assertEqual(entries[0][3]["email"], [None, "john@example.com"])
+        self.assertEqual(entries[1],
+                         ("admin@example.com", "update", "contact", {"first_name": ["John", "Jane"]}))
+        self.assertEqual(entries[2][3]["deleted_at"][0], None)
+        self.assertEqual(self.writer.metrics()["written"], 3)
+
+    def test_both_restore_paths_are_audited_as_restore(self):
+        self.writer.start()
+        db = self.Session()
+        try:
+            contact = create_contact(db, JOHN)
+            contact_id = contact.id
+            delete_contact(db, contact_id)
+            restore_contact(db, contact_id)
+            delete_contact(db, contact_id)
+            archive_deleted_contacts(db, older_than=timedelta(0))
+            restore_contact(db, contact_id)
+        finally:
+            db.close()
+        self.writer.stop()
+        entries = self.entries()
+        self.assertEqual([entry[1] for entry in entries], ["create", "delete", "restore", "delete", "restore"])
+        self.assertEqual(entries[4][3]["email"], [None, "john@example.com"])
+
+    def test_rolled_back_changes_are_not_audited(self):
+        self.writer.start()
+        db = self.Session()
+        try:
+            db.add(Contact(first_name="John", last_name="Doe", email="john@example.com", phone_number="123"))
+            db.flush()
+            db.rollback()
+        finally:
+            db.close()
+        self.writer.stop()
+        self.assertEqual(self.entries(), [])
+
+    def test_not_running_captures_nothing(self):
+        db = self.Session()
+        try:
+            db.add(Contact(first_name="John", last_name="Doe", email="john@example.com", phone_number="123"))
+            db.commit()
+        finally:
+            db.close()
+        self.assertEqual(self.writer.metrics()["backlog"], 0)
+
+    def test_full_queue_drops_entries(self):
+        for i in range(12):
+            self.writer.enqueue({"action": "update", "entity": "contact", "entity_id": i})
+        self.assertEqual(self.writer.metrics()["backlog"], 10)
+        self.assertEqual(self.writer.metrics()["dropped"], 2)
+        self.writer.flush()
+        self.assertEqual(len(self.entries()), 10)
+        self.assertEqual(self.writer.metrics()["written"], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
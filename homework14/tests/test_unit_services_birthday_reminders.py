@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from fastapi_mail.errors import ConnectionErrors
+from datetime import date
+from sqlalchemy.orm import Session
+
+from src.database.models import Contact
+from src.services.birthday_reminders import run_birthday_reminders, JOB_NAME
+
+
+class TestBirthdayReminders(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.db = MagicMock(spec=Session)
+        self.fm = MagicMock()
+        self.fm.send_message = AsyncMock()
+        self.run_date = date(2024, 4, 22)
+        self.contacts = [
+            Contact(id=i, first_name=f"John{i}", email=f"john{i}@example.com", birthday=date(1990, 4, 22))
+            for i in range(1, 6)
+        ]
+
+    @patch("src.services.birthday_reminders.save_checkpoint")
+    @patch("src.services.birthday_reminders.get_checkpoint", return_value=0)
+    @patch("src.services.birthday_reminders.get_birthdays_page")
+    async def test_run_birthday_reminders(self, get_page, get_checkpoint, save_checkpoint):
+        get_page.side_effect = [self.contacts[:3], self.contacts[3:], []]
+        stats = await run_birthday_reminders(self.db, run_date=self.run_date, batch_size=3, fm=self.fm)
+        self.assertEqual(self.fm.send_message.await_count, 5)
+        self.assertEqual(stats["sent"], 5)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["last_id"], 5)
+        self.assertEqual(get_page.call_args_list[1].kwargs["after_id"], 3)
+        save_checkpoint.assert_called_with(self.db, JOB_NAME, self.run_date, 5)
+        self.assertEqual(save_checkpoint.call_count, 2)
+
+    @patch("src.services.birthday_reminders.save_checkpoint")
+    @patch("src.services.birthday_reminders.get_checkpoint", return_value=3)
+    @patch("src.services.birthday_reminders.get_birthdays_page")
+    async def test_run_birthday_reminders_resumes(self, get_page, get_checkpoint, save_checkpoint):
+        get_page.side_effect = [self.contacts[3:], []]
+        stats = await run_birthday_reminders(self.db, run_date=self.run_date, days_ahead=0, fm=self.fm)
+        self.assertEqual(get_page.call_args_list[0].kwargs["after_id"], 3)
+        self.assertEqual(stats["sent"], 2)
+
+    @patch("src.services.birthday_reminders.record_failures")
+    @patch("src.services.birthday_reminders.save_checkpoint")
+    @patch("src.services.birthday_reminders.get_checkpoint", return_value=0)
+    @patch("src.services.birthday_reminders.get_birthdays_page")
+    async def test_run_birthday_reminders_records_failures(self, get_page, get_checkpoint, save_checkpoint,
+                                                           record_failures):
+        get_page.side_effect = [self.contacts[:3], []]
+        self.fm.send_message.side_effect = [None, ConnectionErrors("down"), None]
+        stats = await run_birthday_reminders(self.db, run_date=self.run_date, fm=self.fm)
+        self.assertEqual((stats["sent"], stats["failed"]), (2, 1))
+        record_failures.assert_called_once_with(self.db, JOB_NAME, self.run_date, [2])
+        save_checkpoint.assert_called_once_with(self.db, JOB_NAME, self.run_date, 3)
+
+    @patch("src.services.birthday_reminders.clear_failures")
+    @patch("src.services.birthday_reminders.get_contacts_by_ids")
+    @patch("src.services.birthday_reminders.get_failures", return_value=[1, 2, 9])
+    @patch("src.services.birthday_reminders.save_checkpoint")
+    @patch("src.services.birthday_reminders.get_checkpoint", return_value=5)
+    @patch("src.services.birthday_reminders.get_birthdays_page", return_value=[])
+    async def test_run_birthday_reminders_retries_failures(self, get_page, get_checkpoint, save_checkpoint,
+                                                           get_failures, get_by_ids, clear_failures):
+        get_by_ids.return_value = (self.contacts[:2], [9])
+        self.fm.send_message.side_effect = [None, ConnectionErrors("down")]
+        stats = await run_birthday_reminders(self.db, run_date=self.run_date, fm=self.fm)
+        self.assertEqual((stats["sent"], stats["failed"], stats["retried"]), (1, 1, 3))
+        clear_failures.assert_called_once_with(self.db, JOB_NAME, self.run_date, [9, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import json
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+from datetime import datetime
+
+from src.database.models import ContactChange
+from src.services.change_feed import format_event, stream_changes
+
+
+class TestChangeFeed(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.change = ContactChange(seq=7, contact_id=1, operation="update", data={"first_name": "Jane"},
+                                    created_at=datetime(2024, 4, 22, 12, 0))
+
+    def test_format_event(self):
+        event = format_event(self.change)
+        lines = event.split("\n")
+        self.assertEqual(lines[0], "id: 7")
+        self.assertEqual(lines[1], "event: update")
+        self.assertEqual(json.loads(lines[2][len("data: "):])["data"], {"first_name": "Jane"})
+        self.assertTrue(event.endswith("\n\n"))
+
+    @patch("src.services.change_feed.get_changes")
+    async def test_stream_changes(self, get_changes):
+        get_changes.side_effect = [[self.change], []]
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(side_effect=[False, False, True])
+        session_factory = MagicMock()
+        events = [event async for event in stream_changes(request, session_factory, since=6, poll_interval=0)]
+        self.assertEqual(events, [format_event(self.change)])
+        self.assertEqual(get_changes.call_args_list[0].kwargs["since"], 6)
+        self.assertEqual(get_changes.call_args_list[1].kwargs["since"], 7)
+        self.assertEqual(session_factory.return_value.close.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from datetime import date
+from sqlalchemy.orm import Session
+
+from src.database.models import Contact
+from src.repository.contacts import normalize_contact
+from src.services.normalization import normalize_email, normalize_phone, soundex, NORMALIZATION_VERSION
+from src.services.dedupe import score_pair, find_duplicates, iter_duplicate_pairs, backfill_normalized
+
+
+class TestNormalization(unittest.TestCase):
+
+    def test_normalize_email(self):
+        self.assertEqual(normalize_email("  John.Doe@Example.COM "), "john.doe@example.com")
+        self.assertIsNone(normalize_email(""))
+
+    def test_normalize_phone(self):
+        self.assertEqual(normalize_phone("+1 (555) 123-4567"), "+15551234567")
+        self.assertEqual(normalize_phone("0044 20 7946 0958"), "+442079460958")
+        self.assertEqual(normalize_phone("050 123 45 67", country_code="380"), "+380501234567")
+        self.assertEqual(normalize_phone("380501234567", country_code="380"), "+380501234567")
+        self.assertIsNone(normalize_phone("n/a"))
+
+    def test_soundex(self):
+        self.assertEqual(soundex("Robert"), "R163")
+        self.assertEqual(soundex("Rupert"), "R163")
+        self.assertEqual(soundex("Ashcraft"), "A261")
+        self.assertEqual(soundex("Tymczak"), "T522")
+        self.assertIsNone(soundex(""))
+
+
+class TestDedupe(unittest.TestCase):
+
+    def setUp(self):
+        self.db = MagicMock(spec=Session)
+        self.john = self._contact(1, "John", "Smith", "John.Smith@example.com", "+380501234567")
+        self.jon = self._contact(2, "Jon", "Smyth", "john.smith@example.com", "050 123 45 67")
+        self.jane = self._contact(3, "Jane", "Doe", "jane@example.com", "111", date(1985, 6, 1))
+
+    @staticmethod
+    def _contact(contact_id, first_name, last_name, email, phone_number, birthday=date(1990, 1, 2)):
+        contact = Contact(id=contact_id, first_name=first_name, last_name=last_name, email=email,
+                          phone_number=phone_number, birthday=birthday)
+        normalize_contact(contact)
+        return contact
+
+    def test_score_pair(self):
+        self.assertGreaterEqual(score_pair(self.john, self.jon), 0.9)
+        self.assertLess(score_pair(self.john, self.jane), 0.5)
+
+    @patch("src.services.dedupe.get_duplicate_candidates")
+    def test_find_duplicates(self, get_candidates):
+        get_candidates.return_value = [self.jane, self.jon]
+        duplicates = find_duplicates(self.db, self.john)
+        self.assertEqual([contact for contact, score in duplicates], [self.jon])
+
+    @patch("src.services.dedupe.get_block_contacts")
+    @patch("src.services.dedupe.get_blocks")
+    def test_iter_duplicate_pairs_reports_each_pair_once(self, get_blocks, get_block_contacts):
+        get_blocks.return_value = [("key",)]
+        get_block_contacts.return_value = [self.john, self.jon]
+        pairs = list(iter_duplicate_pairs(self.db))
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual(pairs[0][:2], (1, 2))
+
+    @patch("src.services.dedupe.get_unnormalized_contacts")
+    def test_backfill_normalized(self, get_unnormalized):
+        contact = Contact(id=5, first_name="A", last_name="Doe", email="A@B.com", phone_number="+1 555")
+        get_unnormalized.side_effect = [[contact], []]
+        self.assertEqual(backfill_normalized(self.db), 1)
+        self.assertEqual(contact.email_normalized, "a@b.com")
+        self.assertEqual(contact.last_name_phonetic, "D000")
+        self.assertEqual(get_unnormalized.call_args_list[1].kwargs["after_id"], 5)
+        self.db.commit.assert_called_once()
+
+    @patch("src.services.dedupe.get_unnormalized_contacts")
+    def test_backfill_normalized_marks_contacts_without_phonetic_code(self, get_unnormalized):
+        contact = Contact(id=6, first_name="A", last_name="123", email="c@d.com", phone_number="+1 556")
+        get_unnormalized.side_effect = [[contact], []]
+        self.assertEqual(backfill_normalized(self.db), 1)
+        self.assertIsNone(contact.last_name_phonetic)
+        self.assertEqual(contact.normalized_version, NORMALIZATION_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+import pytest
+from fastapi import HTTPException
+
+from src.database.models import IdempotencyKey
+from src.schemas import Token
+from src.services import idempotency
+from src.services.audit_context import current_actor
+from src.services.idempotency import idempotent, idempotent_sync
+
+
+class TestIdempotency(unittest.IsolatedAsyncioTestCase):
+
+    @pytest.fixture(autouse=True)
+    def setup_database(self, committed_session_factory):
+        self.Session = committed_session_factory
+        self.calls = 0
+
+    async def handler(self):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return {"access_token": f"token{self.calls}", "token_type": "bearer"}
+
+    async def call(self, key, payload=None, actor=None):
+        db = self.Session()
+        try:
+            return await idempotent(db, key, "test", payload or {"email": "a@b.com"}, self.handler,
+                                    response_model=Token, status_code=201, actor=actor)
+        finally:
+            db.close()
+
+    async def test_retry_replays_stored_response(self):
+        first = await self.call("key")
+        retry = await self.call("key")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.body, b'{"access_token":"token1","token_type":"bearer"}')
+        self.assertEqual(first.access_token, "token1")
+
+    async def test_replay_rebuilds_response_without_storing_it(self):
+        db = self.Session()
+        try:
+            for _ in range(2):
+                result = await idempotent(db, "key", "test", {}, self.handler, response_model=Token,
+                                          status_code=201,
+                                          replay=lambda: {"access_token": "fresh", "token_type": "bearer"})
+            self.assertIsNone(db.query(IdempotencyKey).one().response_body)
+        finally:
+            db.close()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(result.body, b'{"access_token":"fresh","token_type":"bearer"}')
+
+    async def test_concurrent_duplicates_wait_for_first(self):
+        results = await asyncio.gather(*(self.call("key") for _ in range(3)))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sum(1 for result in results if isinstance(result, Token)), 1)
+
+    async def test_key_reused_with_different_request(self):
+        await self.call("key")
+        with self.assertRaises(HTTPException) as context:
+            await self.call("key", {"email": "other@b.com"})
+        self.assertEqual(context.exception.status_code, 422)
+
+    async def test_keys_are_scoped_to_the_actor(self):
+        first = await self.call("key", actor="alice@example.com")
+        other = await self.call("key", actor="bob@example.com")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual((first.access_token, other.access_token), ("token1", "token2"))
+        with self.assertRaises(HTTPException) as context:
+            await self.call("key", {"email": "other@b.com"}, actor="alice@example.com")
+        self.assertEqual(context.exception.status_code, 422)
+        self.assertEqual(self.calls, 2)
+
+    async def test_actor_defaults_to_current_actor(self):
+        token = current_actor.set("alice@example.com")
+        try:
+            await self.call("key")
+        finally:
+            current_actor.reset(token)
+        db = self.Session()
+        try:
+            self.assertEqual(db.query(IdempotencyKey).one().actor, "alice@example.com")
+        finally:
+            db.close()
+
+    async def test_without_key_runs_handler(self):
+        await self.call(None)
+        await self.call(None)
+        self.assertEqual(self.calls, 2)
+
+    async def test_sync_handler_runs_in_threadpool(self):
+        db = self.Session()
+        try:
+            thread = await idempotent(db, "key", "test", {}, threading.get_ident)
+        finally:
+            db.close()
+        self.assertNotEqual(thread, threading.get_ident())
+
+    def test_idempotent_sync_replays_stored_response(self):
+        def handler():
+            self.calls += 1
+            return {"access_token": "token", "token_type": "bearer"}
+
+        db = self.Session()
+        try:
+            first = idempotent_sync(db, "key", "test", {}, handler, response_model=Token, status_code=201)
+            retry = idempotent_sync(db, "key", "test", {}, handler, response_model=Token, status_code=201)
+        finally:
+            db.close()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first.access_token, "token")
+        self.assertEqual(retry.status_code, 201)
+
+    def test_purge_is_throttled(self):
+        db = self.Session()
+        try:
+            with patch.object(idempotency, "_next_purge", 0.0), \
+                    patch.object(idempotency, "purge_expired_idempotency_keys") as purge:
+                for key in ("a", "b", "c"):
+                    idempotent_sync(db, key, "test", {}, dict)
+        finally:
+            db.close()
+        purge.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()